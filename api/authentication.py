@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework import exceptions, permissions
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api.serializers.tokens import TOKEN_VERSION_CLAIM
+from core.services.token_versions import user_auth_state
+
+BASIC_AUTH_CACHE_TIMEOUT = 60 * 5
+
+
+def _credentials_key(userid, password) -> str:
+    # neither the credentials nor anything they could be guessed from without the secret key end up in the cache
+    digest = salted_hmac('api.authentication.credentials', f'{userid}\0{password}', algorithm='sha256')
+    return f'basic_auth:{digest.hexdigest()}'
+
+
+def _password_fingerprint(user) -> str:
+    return salted_hmac('api.authentication.password', user.password, algorithm='sha256').hexdigest()
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    Basic authentication remembering the credentials it verified for `BASIC_AUTH_CACHE_TIMEOUT` seconds, so that a
+    client sending the same credentials on every call pays the password hash once rather than on every request.
+
+    The cache maps an HMAC of the credentials to the user id and a fingerprint of the user's password hash. A hit
+    still loads the user: changing the password (which changes the hash) or the username, or deactivating the user,
+    invalidates the entry at once. Failed attempts are never cached and always pay the hash.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        key = _credentials_key(userid, password)
+        verified = cache.get(key)
+        if verified is not None:
+            user_id, fingerprint = verified
+            user = get_user_model()._default_manager.filter(pk=user_id).first()
+            if (
+                user is not None and user.is_active and user.get_username() == userid
+                and constant_time_compare(fingerprint, _password_fingerprint(user))
+            ):
+                return user, None
+            cache.delete(key)
+
+        user, auth = super().authenticate_credentials(userid, password, request=request)
+        cache.set(key, (user.pk, _password_fingerprint(user)), BASIC_AUTH_CACHE_TIMEOUT)
+        return user, auth
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    JWT authentication that doesn't load the user of a read request. The signed claims of the token (user id,
+    `is_staff`, `is_superuser`) make a `TokenUser`, checked against the user's cached state (see
+    `core.services.token_versions`): the user must exist, be active, have the claimed flags and the token the
+    current version. Writes, tokens without a version and views setting `stateless_authentication = False` (those
+    needing permissions, groups or other fields of the user) get the user from the database as before.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        view = (getattr(request, 'parser_context', None) or {}).get('view')
+        if (
+            request.method in permissions.SAFE_METHODS and getattr(view, 'stateless_authentication', True)
+            and TOKEN_VERSION_CLAIM in validated_token
+        ):
+            state = self._check_state(validated_token)
+            if (state.is_staff, state.is_superuser) == (
+                validated_token.get('is_staff'), validated_token.get('is_superuser')
+            ):
+                return jwt_settings.TOKEN_USER_CLASS(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if TOKEN_VERSION_CLAIM in validated_token:
+            self._check_state(validated_token)
+        return user
+
+    @staticmethod
+    def _check_state(validated_token):
+        """The user's cached state, raises `AuthenticationFailed` for a missing or inactive user or a revoked token"""
+        state = user_auth_state(validated_token[jwt_settings.USER_ID_CLAIM])
+        if state is None:
+            raise exceptions.AuthenticationFailed('User not found', code='user_not_found')
+        if not state.is_active:
+            raise exceptions.AuthenticationFailed('User is inactive', code='user_inactive')
+        if validated_token[TOKEN_VERSION_CLAIM] != state.token_version:
+            raise exceptions.AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return state
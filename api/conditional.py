@@ -0,0 +1,67 @@
+import hashlib
+from datetime import timedelta
+
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+# Last-Modified has a one second resolution, a resource changed within the last second could change again within the
+# same second and still match the client's If-Modified-Since, so it only gets an ETag
+LAST_MODIFIED_DELAY = timedelta(seconds=1)
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for viewsets of models with an `updated_at` field. Responses carry a weak `ETag` and a
+    `Last-Modified` header, a request with a matching `If-None-Match` (or `If-Modified-Since`) gets a 304 without
+    the response being built.
+
+    The validators of a list are derived from the filtered queryset with one aggregate query, `COUNT(*)` and
+    `MAX(updated_at)`: a row added, removed or updated changes them. The ETag of a list also covers the query string,
+    page cursor included, so every page has its own. The validators of a detail are the object's `updated_at`.
+    Writes bypassing `updated_at` (`QuerySet.update()` without it) are not seen.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_list_version(self, queryset):
+        """(ETag components, last modified) of a list"""
+        version = queryset.aggregate(count=Count('pk'), last_modified=Max(self.last_modified_field))
+        return (version['count'], version['last_modified']), version['last_modified']
+
+    def get_object_version(self, instance):
+        """(ETag components, last modified) of a detail"""
+        last_modified = getattr(instance, self.last_modified_field)
+        return (instance.pk, last_modified), last_modified
+
+    def conditional_response(self, request, version, respond):
+        """
+        304 Not Modified when the client's copy is current, else `respond()` with the validators of `version`
+        """
+        components, last_modified = version
+        digest = hashlib.sha256(f'{request.get_full_path()}|{request.accepted_media_type}|{components}'.encode())
+        etag = f'W/"{digest.hexdigest()[:32]}"'
+        if last_modified is not None and timezone.now() - last_modified < LAST_MODIFIED_DELAY:
+            last_modified = None
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+        if 200 <= response.status_code < 300 or response.status_code == 304:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        version = self.get_list_version(self.filter_queryset(self.get_queryset()))
+        respond = super().list
+        return self.conditional_response(request, version, lambda: respond(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            request, self.get_object_version(instance), lambda: Response(self.get_serializer(instance).data)
+        )
@@ -0,0 +1,18 @@
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from api.errors import handle
+
+
+def exception_handler(exc, context):
+    """Renders the errors DRF handles in the `api.errors.handle` format, keeping headers like WWW-Authenticate"""
+    response = drf_exception_handler(exc, context)
+    if response is None:
+        return None
+
+    message = response.data
+    if isinstance(message, dict) and set(message) == {'detail'}:
+        message = message['detail']
+    error_response = handle(message, status=response.status_code, code=getattr(exc, 'default_code', None))
+    for header, value in response.items():
+        error_response[header] = value
+    return error_response
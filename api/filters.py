@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django_filters import rest_framework as filters
+
+from core.models import Inventory
+from core.models.products import PRODUCT_TYPE
+
+# `updated_at` is stamped before the write commits: a write stamped earlier than the rows a poll saw can still
+# commit after that poll. Delta polling goes back this much before the last `updated_at` seen, longer than any
+# write transaction, and gets the rows changed since then again.
+DELTA_SYNC_OVERLAP = timedelta(minutes=5)
+
+
+class InventoryFilter(filters.FilterSet):
+    warehouse = filters.NumberFilter(field_name='warehouse_id')
+    product_type = filters.ChoiceFilter(field_name='product__product_type', choices=PRODUCT_TYPE)
+    sku = filters.CharFilter(field_name='product__sku')
+    updated_at__gt = filters.IsoDateTimeFilter(
+        field_name='updated_at', lookup_expr='gt',
+        help_text=f'For delta polling, the last `updated_at` seen minus {DELTA_SYNC_OVERLAP.seconds // 60} minutes: '
+                  f'rows are stamped before their write commits',
+    )
+
+    class Meta:
+        model = Inventory
+        fields = ('warehouse', 'product_type', 'sku', 'updated_at__gt')
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import uuid
+from functools import wraps
+
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from core.services.idempotency import claim_idempotency_key, idempotency_key, record_idempotent_response
+from utils.db import retry_on_serialization_failure
+
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress, retry later'
+    default_code = 'idempotency_key_in_progress'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was used for a different request'
+    default_code = 'idempotency_key_reused'
+
+
+def _file_digest(value):
+    if isinstance(value, UploadedFile):
+        digest = hashlib.sha256()
+        for chunk in value.chunks():
+            digest.update(chunk)
+        value.seek(0)
+        return digest.hexdigest()
+    return str(value)
+
+
+def _fingerprint(request) -> uuid.UUID:
+    """Hash of the request path and payload, uploaded files included"""
+    data = dict(request.data.lists()) if hasattr(request.data, 'lists') else request.data
+    digest = hashlib.sha256(request.get_full_path().encode())
+    digest.update(json.dumps(data, sort_keys=True, default=_file_digest).encode())
+    return uuid.UUID(bytes=digest.digest()[:16])
+
+
+def _replay(existing, request_hash):
+    if existing.request_hash != request_hash:
+        raise IdempotencyKeyReused()
+    if existing.status_code is None:
+        raise IdempotencyKeyInProgress()
+    return Response(existing.response, status=existing.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+@retry_on_serialization_failure
+def _claim_and_run(view, method, request, key, request_hash, args, kwargs):
+    existing = claim_idempotency_key(key, request_hash)
+    if existing is not None:
+        return _replay(existing, request_hash)
+    response = method(view, request, *args, **kwargs)
+    record_idempotent_response(key, response.status_code, response.data)
+    return response
+
+
+def idempotent(scope, atomic=True):
+    """
+    Makes a viewset action idempotent for the requests sent with an `Idempotency-Key` header: the response of the
+    first attempt is stored and returned to the retries of the same user with the same key and payload, without
+    running the action again. Requests without the header are not affected.
+
+    With `atomic` the action runs in the transaction claiming the key, a concurrent duplicate waits for it. That
+    transaction is retried as a whole on deadlocks and serialization failures, the writes inside it can't retry on
+    their own. Actions committing several transactions use `atomic=False`: the key is claimed up front, concurrent
+    duplicates get a 409 until the first attempt is done and an unexpected error is stored as its response, since
+    part of the work may have been committed. A claim left in progress (the process died) is taken over by a retry
+    once `IDEMPOTENCY_KEY_LEASE` is over.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            client_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+            if client_key is None:
+                return method(self, request, *args, **kwargs)
+            if not client_key or len(client_key) > MAX_KEY_LENGTH:
+                raise ValidationError({IDEMPOTENCY_KEY_HEADER: f'Must be 1 to {MAX_KEY_LENGTH} characters long'})
+
+            key = idempotency_key(client_key, scope, request.user.pk)
+            request_hash = _fingerprint(request)
+            if atomic:
+                return _claim_and_run(self, method, request, key, request_hash, args, kwargs)
+
+            with transaction.atomic():
+                existing = claim_idempotency_key(key, request_hash)
+            if existing is not None:
+                return _replay(existing, request_hash)
+            try:
+                response = method(self, request, *args, **kwargs)
+            except APIException as exc:
+                response = self.handle_exception(exc)
+            except Exception:
+                record_idempotent_response(key, status.HTTP_500_INTERNAL_SERVER_ERROR, {'error': {
+                    'status': status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    'code': 'error',
+                    'message': 'The request failed part way, check its effects before retrying with a new key',
+                }})
+                raise
+            record_idempotent_response(key, response.status_code, response.data)
+            return response
+        return wrapper
+    return decorator
@@ -1,5 +1,153 @@
-from rest_framework.pagination import PageNumberPagination as DRFPageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, PageNumberPagination as DRFPageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class PageNumberPagination(DRFPageNumberPagination):
     page_size_query_param = 'page_size'
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on a unique ordering, `(created_at, id)` newest first by default. A page is the next
+    `page_size` rows after the cursor's position, `WHERE (created_at, id) < (x, y)`, so there is no COUNT and no
+    OFFSET and the 10,000th page costs the same index range scan as the first one, given an index on the ordering.
+    Cursors are opaque, stay valid while rows are added or removed, and page in both directions; a
+    `previous` cursor without a position is the last page.
+
+    Set `ordering` on a subclass for another key, its fields must be non nullable and the last one unique, e.g.
+    `('id',)` or `('updated_at', 'id')`.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(
+            f"{'-' if name.startswith('-') else ''}{queryset.model._meta.pk.name}" if name.lstrip('-') == 'pk' else name
+            for name in self.get_ordering(request, queryset, view)
+        )
+        self.cursor = self.decode_cursor(request)
+        reverse, position = (self.cursor.reverse, self.cursor.position) if self.cursor else (False, None)
+        if position is not None:
+            position = self._to_python(queryset.model, position)
+
+        ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering) \
+            if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = self._after(queryset, ordering, position)
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # nothing left before the cursor, the next page is the first one
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self._position(self.page[0]) if self.page else None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = tokens.get('p')
+            if position is not None and (
+                not isinstance(position, list) or len(position) != len(self.ordering)
+                or not all(isinstance(value, str) for value in position)
+            ):
+                raise ValueError('Invalid position')
+            return Cursor(offset=0, reverse=bool(tokens.get('r')), position=position)
+        except (AttributeError, BinasciiError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.position}
+        if cursor.reverse:
+            tokens['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _position(self, instance):
+        names = [name.lstrip('-') for name in self.ordering]
+        if isinstance(instance, dict):
+            return [str(instance[name]) for name in names]
+        return [str(getattr(instance, name)) for name in names]
+
+    def _to_python(self, model, position):
+        try:
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def _after(queryset, ordering, position):
+        """
+        The rows strictly after the position. With a single direction it's a row comparison, `(a, b) > (x, y)`,
+        which Postgres turns into an index seek on the whole key. Mixed directions fall back to
+        a > x OR (a = x AND (b > y OR ...)) with a >= x repeated as a plain range condition for the index scan.
+        """
+        meta = queryset.model._meta
+        fields = [meta.get_field(name.lstrip('-')) for name in ordering]
+        descending = {name.startswith('-') for name in ordering}
+        if len(descending) == 1:
+            columns = [
+                f'{connection.ops.quote_name(meta.db_table)}.{connection.ops.quote_name(field.column)}'
+                for field in fields
+            ]
+            operator = '<' if descending.pop() else '>'
+            params = [field.get_db_prep_value(value, connection) for field, value in zip(fields, position)]
+            # the leading bound is redundant, it gives the planner a sane row estimate for the row comparison
+            placeholders = ', '.join(['%s'] * len(fields))
+            return queryset.filter(RawSQL(
+                f"{columns[0]} {operator}= %s AND ({', '.join(columns)}) {operator} ({placeholders})",
+                [params[0], *params],
+                output_field=BooleanField(),
+            ))
+
+        lookups = [
+            (name[1:], 'lt', value) if name.startswith('-') else (name, 'gt', value)
+            for name, value in zip(ordering, position)
+        ]
+        name, lookup, value = lookups[-1]
+        condition = Q(**{f'{name}__{lookup}': value})
+        for name, lookup, value in reversed(lookups[:-1]):
+            condition = Q(**{f'{name}__{lookup}': value}) | Q(**{name: value}) & condition
+        name, lookup, value = lookups[0]
+        return queryset.filter(Q(**{f'{name}__{lookup}e': value}) & condition)
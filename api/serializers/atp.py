@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+MAX_PRODUCTS = 500
+
+
+class AvailableToPromiseQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    products = serializers.CharField(help_text='Comma separated product ids')
+    warehouse = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_products(self, value):  # pylint: disable=no-self-use
+        try:
+            products = sorted({int(product) for product in value.split(',') if product.strip()})
+        except ValueError:
+            raise serializers.ValidationError('Must be a comma separated list of product ids')
+        if not products:
+            raise serializers.ValidationError('At least one product id is required')
+        if len(products) > MAX_PRODUCTS:
+            raise serializers.ValidationError(f'At most {MAX_PRODUCTS} products per request')
+        return products
+
+
+class AvailableToPromiseSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    product = serializers.IntegerField()
+    warehouse = serializers.IntegerField(allow_null=True)
+    available = serializers.IntegerField()
@@ -0,0 +1,38 @@
+from rest_framework import serializers
+
+from core.models import InventoryAdjustment
+from core.services.change_feed import MAX_BATCH_SIZE, MAX_TIMEOUT
+
+
+class ChangeFeedQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    after = serializers.IntegerField(min_value=0, default=0, help_text='The `cursor` of the previous batch')
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_BATCH_SIZE, default=MAX_BATCH_SIZE)
+    timeout = serializers.FloatField(
+        min_value=0, max_value=MAX_TIMEOUT, default=0, help_text='Seconds to wait for a change when there is none'
+    )
+    warehouse = serializers.IntegerField(min_value=1, required=False)
+    reason = serializers.ListField(
+        child=serializers.ChoiceField(choices=InventoryAdjustment.REASON_CHOICES), required=False
+    )
+
+
+class ChangeSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    id = serializers.IntegerField()
+    inventory = serializers.IntegerField()
+    warehouse = serializers.IntegerField()
+    product = serializers.IntegerField()
+    lot_code = serializers.IntegerField(allow_null=True)
+    source_adjustment = serializers.IntegerField()
+    reason = serializers.CharField()
+    unordered_change = serializers.IntegerField()
+    ordered_change = serializers.IntegerField()
+    fulfilled_change = serializers.IntegerField()
+    absolute_post_unordered = serializers.IntegerField()
+    absolute_post_ordered = serializers.IntegerField()
+    absolute_post_fulfilled = serializers.IntegerField()
+    created_at = serializers.DateTimeField()
+
+
+class ChangeBatchSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    cursor = serializers.IntegerField()
+    results = ChangeSerializer(many=True)
@@ -0,0 +1,6 @@
+from rest_framework import serializers
+
+
+class ExportQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    created_at__gte = serializers.DateTimeField(required=False)
+    created_at__lt = serializers.DateTimeField(required=False)
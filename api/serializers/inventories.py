@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+from api.serializers.products import LotCodeSerializer, ProductSerializer
+from api.serializers.warehouses import LocationSerializer, WarehouseSerializer
+from core.models import Inventory
+from utils.serializers import DynamicFieldsMixin
+
+
+class InventorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    sku = serializers.CharField(source='product.sku')
+    product_name = serializers.CharField(source='product.name')
+    variant = serializers.CharField(source='product.variant')
+    product_type = serializers.CharField(source='product.product_type')
+    warehouse_code = serializers.CharField(source='warehouse.short_code', allow_null=True)
+    lot_number = serializers.CharField(source='lot_code.lot_number', allow_null=True)
+    location_label = serializers.CharField(source='location.label', allow_null=True)
+
+    class Meta:
+        model = Inventory
+        fields = (
+            'id', 'uuid', 'product', 'sku', 'product_name', 'variant', 'product_type', 'warehouse', 'warehouse_code',
+            'lot_code', 'lot_number', 'location', 'location_label', 'unordered', 'ordered', 'fulfilled', 'updated_at',
+        )
+        expandable_fields = {
+            'product': ProductSerializer,
+            'warehouse': WarehouseSerializer,
+            'lot_code': LotCodeSerializer,
+            'location': LocationSerializer,
+        }
@@ -0,0 +1,49 @@
+from rest_framework import serializers
+
+from core.models import Inventory, InventoryAdjustment, LineItem, Order, Receipt
+
+MAX_ADJUSTMENTS = 1000
+
+# field: model of the referenced rows
+REFERENCES = (('inventory', Inventory), ('order', Order), ('receipt', Receipt), ('line_item', LineItem))
+
+
+class AdjustmentListSerializer(serializers.ListSerializer):  # pylint: disable=abstract-method
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('At least one adjustment is required')
+        if len(attrs) > MAX_ADJUSTMENTS:
+            raise serializers.ValidationError(f'At most {MAX_ADJUSTMENTS} adjustments per request')
+        # one query per referenced model rather than one per adjustment and field
+        for field, model in REFERENCES:
+            ids = {adjustment[field] for adjustment in attrs if adjustment.get(field) is not None}
+            missing = ids - set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+            if missing:
+                raise serializers.ValidationError(f'Unknown {field}: {sorted(missing, key=str)[:10]}')
+        return attrs
+
+
+class AdjustmentSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    inventory = serializers.IntegerField(min_value=1)
+    reason = serializers.ChoiceField(choices=InventoryAdjustment.REASON_CHOICES)
+    unordered_change = serializers.IntegerField(default=0)
+    ordered_change = serializers.IntegerField(default=0)
+    fulfilled_change = serializers.IntegerField(default=0)
+    order = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    receipt = serializers.UUIDField(required=False, allow_null=True)
+    line_item = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    comment = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+
+    class Meta:
+        list_serializer_class = AdjustmentListSerializer
+
+
+class InventoryAdjustmentSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = InventoryAdjustment
+        fields = (
+            'id', 'inventory', 'reason', 'unordered_change', 'ordered_change', 'fulfilled_change',
+            'order', 'receipt', 'line_item', 'comment', 'created_at',
+        )
@@ -0,0 +1,49 @@
+from rest_framework import serializers
+
+from core.models import Customer
+
+MAX_LINE_ITEMS = 200
+
+
+class OrderCustomerSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Customer
+        fields = ('name', 'email', 'phone', 'address_1', 'address_2', 'city', 'state', 'zip_code')
+
+    def validate(self, attrs):
+        if not attrs.get('email') and not attrs.get('phone'):
+            raise serializers.ValidationError('An email or a phone is required')
+        return attrs
+
+
+class OrderLineItemSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    product = serializers.IntegerField(min_value=1)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    quantity = serializers.IntegerField(min_value=1, max_value=32767)
+
+
+class OrderIntakeSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    tracking_id = serializers.CharField(max_length=100)
+    print_priority = serializers.IntegerField(min_value=1, max_value=10, default=5)
+    customer = OrderCustomerSerializer(help_text='Matched with an existing customer by email, then phone')
+    line_items = OrderLineItemSerializer(many=True, allow_empty=False)
+
+    def validate_line_items(self, value):  # pylint: disable=no-self-use
+        if len(value) > MAX_LINE_ITEMS:
+            raise serializers.ValidationError(f'At most {MAX_LINE_ITEMS} line items per order')
+        return value
+
+
+class OrderResultSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    tracking_id = serializers.CharField(allow_null=True)
+    created = serializers.BooleanField()
+    order = serializers.IntegerField(source='order_id', allow_null=True)
+    customer = serializers.IntegerField(source='customer_id', allow_null=True)
+    errors = serializers.ListField(child=serializers.CharField())
+
+
+class OrderIntakeResultSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    created = serializers.IntegerField()
+    failed = serializers.IntegerField()
+    results = OrderResultSerializer(many=True)
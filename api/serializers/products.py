@@ -0,0 +1,19 @@
+from rest_framework import serializers
+
+from core.models import LotCode, Product
+from utils.serializers import DynamicFieldsMixin
+
+
+class ProductSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = Product
+        fields = ('id', 'sku', 'name', 'product_type', 'variant', 'updated_at', 'disabled_at')
+
+
+class LotCodeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = LotCode
+        fields = ('id', 'uuid', 'lot_number', 'product')
+        expandable_fields = {'product': ProductSerializer}
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+
+from core.models import Warehouse
+
+
+class ReceiptImportSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    file = serializers.FileField(help_text='CSV or JSONL lines: sku, quantity, price, variant, lot_number')
+    warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.filter(deleted_at=None))
+    po_number = serializers.CharField(max_length=128, required=False, allow_null=True, allow_blank=True)
+    format = serializers.ChoiceField(choices=('csv', 'jsonl'), required=False)
+
+
+class RowErrorSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    line = serializers.IntegerField()
+    error = serializers.CharField()
+    row = serializers.DictField()
+
+
+class ReceiptImportResultSerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    receipt = serializers.UUIDField(source='receipt.uuid')
+    rows = serializers.IntegerField()
+    imported = serializers.IntegerField()
+    error_count = serializers.IntegerField()
+    errors = RowErrorSerializer(many=True)
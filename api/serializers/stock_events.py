@@ -0,0 +1,6 @@
+from rest_framework import serializers
+
+
+class StockEventsQuerySerializer(serializers.Serializer):  # pylint: disable=abstract-method
+    warehouse = serializers.IntegerField(min_value=1, required=False)
+    product = serializers.IntegerField(min_value=1, required=False)
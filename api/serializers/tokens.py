@@ -0,0 +1,18 @@
+from rest_framework_simplejwt import serializers
+
+from core.services.token_versions import token_version
+
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):  # pylint: disable=abstract-method
+    """Tokens carrying the claims `api.authentication.JWTAuthentication` needs to skip loading the user"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        token[TOKEN_VERSION_CLAIM] = token_version(user.pk)
+        return token
@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from core.models import Location, Warehouse
+from utils.serializers import DynamicFieldsMixin
+
+
+class WarehouseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = Warehouse
+        fields = (
+            'id', 'short_code', 'name', 'business_name', 'address_1', 'address_2', 'city', 'state', 'zip_code',
+            'phone', 'location_type',
+        )
+
+
+class LocationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = Location
+        fields = ('uuid', 'label', 'aisle', 'column', 'level', 'warehouse')
+        expandable_fields = {'warehouse': WarehouseSerializer}
@@ -18,9 +18,9 @@ ENVIRONMENT_COLOR = '#FF0000' if ENVIRONMENT == 'production' else '#F4C430' if E
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.BasicAuthentication',
+        'api.authentication.CachedBasicAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.JWTAuthentication',
     ),
 
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageNumberPagination',
@@ -68,3 +68,5 @@ REDOC_SETTINGS = {
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_AGE = 60 * 30  # After 30 minutes
 SESSION_SAVE_EVERY_REQUEST = True
+# renews the expiry of unchanged sessions without writing them on every request
+SESSION_ENGINE = 'utils.sessions'
@@ -0,0 +1,130 @@
+"""
+Server-Sent Events of the stock changes, served by the ASGI application (`layman_erp.asgi`).
+
+`GET /api/v1/inventory-events/` keeps the response open and sends an `inventory` event, the inventory with its new
+counters and the changes applied, every time an adjustment of it commits; `warehouse` and `product` narrow the
+events down. A comment line is sent when nothing happened for `HEARTBEAT_INTERVAL` seconds so that proxies keep the
+connection open. The stream ends when the client is too slow to keep up or the database connection is lost: the
+client reconnects and reloads the inventories it displays.
+
+The events of a process all come from one `StockListener`, waiting clients cost neither a thread nor a database
+connection. Clients authenticate like with the rest of the API.
+"""
+import asyncio
+import io
+import json
+import logging
+
+import psycopg2
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections, connection
+from rest_framework import exceptions, permissions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.serializers.stock_events import StockEventsQuerySerializer
+from core.services.stock_events import StockListener
+
+logger = logging.getLogger(__name__)
+
+STREAM_PATH = '/api/v1/inventory-events/'
+HEARTBEAT_INTERVAL = 15
+# how long EventSource clients wait before reconnecting
+RETRY_DELAY = 3000
+
+_listener = None
+
+
+def _encode(event) -> bytes:
+    return f"event: inventory\ndata: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+
+
+def get_listener() -> StockListener:
+    global _listener  # pylint: disable=global-statement
+    if _listener is None:
+        _listener = StockListener(
+            connection.get_connection_params(), encode=_encode, heartbeat=b': heartbeat\n\n',
+            heartbeat_interval=HEARTBEAT_INTERVAL,
+        )
+    return _listener
+
+
+def _authenticate(request):
+    """The error (status, code, message, authenticate header) of an unauthenticated request, None otherwise"""
+    request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        if permissions.IsAuthenticated().has_permission(request, None):
+            return None
+        exc = exceptions.NotAuthenticated()
+    except exceptions.AuthenticationFailed as failure:
+        exc = failure
+    finally:
+        close_old_connections()
+    # like DRF, 403 when no authenticator can tell the client how to authenticate
+    header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+    return 401 if header else 403, exc.default_code, exc.detail, header
+
+
+async def _send_error(send, status, code, message, authenticate_header=None):
+    headers = [(b'content-type', b'application/json')]
+    if authenticate_header:
+        headers.append((b'www-authenticate', authenticate_header.encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'error': {'status': status, 'code': code, 'message': message}}).encode(),
+    })
+
+
+async def _close_on_disconnect(receive, subscription):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+async def inventory_events(scope, receive, send):
+    request = ASGIRequest(scope, io.BytesIO())
+    if request.method != 'GET':
+        await _send_error(send, 405, 'method_not_allowed', f'Method "{request.method}" not allowed.')
+        return
+    query = StockEventsQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        await _send_error(send, 400, 'invalid', query.errors)
+        return
+    error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        await _send_error(send, *error)
+        return
+
+    listener = get_listener()
+    try:
+        subscription = await listener.subscribe(
+            warehouse_id=query.validated_data.get('warehouse'), product_id=query.validated_data.get('product')
+        )
+    except psycopg2.Error:
+        logger.exception('Stock listener unavailable')
+        await _send_error(send, 503, 'service_unavailable', 'Stock events are unavailable, retry later.')
+        return
+
+    disconnect = asyncio.ensure_future(_close_on_disconnect(receive, subscription))
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': f'retry: {RETRY_DELAY}\n\n'.encode(), 'more_body': True})
+        while True:
+            events = [await subscription.queue.get()]
+            # the events queued meanwhile go out in the same message
+            while events[-1] is not None and not subscription.queue.empty():
+                events.append(subscription.queue.get_nowait())
+            if events[-1] is None:
+                break
+            await send({'type': 'http.response.body', 'body': b''.join(events), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''.join(events[:-1])})
+    finally:
+        listener.unsubscribe(subscription)
+        disconnect.cancel()
@@ -5,8 +5,24 @@ from drf_yasg.views import get_schema_view
 from rest_framework import permissions, routers
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 
+from api.serializers.tokens import TokenObtainPairSerializer
+from api.viewsets.atp import AvailableToPromiseViewSet
+from api.viewsets.change_feed import InventoryChangeFeedViewSet
+from api.viewsets.exports import ExportViewSet
+from api.viewsets.inventories import InventoryViewSet
+from api.viewsets.inventory_adjustments import InventoryAdjustmentViewSet
+from api.viewsets.orders import OrderViewSet
+from api.viewsets.receipts import ReceiptViewSet
+
 # pylint: disable=invalid-name
 router = routers.SimpleRouter()
+router.register('atp', AvailableToPromiseViewSet, basename='atp')
+router.register('inventories', InventoryViewSet, basename='inventory')
+router.register('receipts', ReceiptViewSet, basename='receipt')
+router.register('inventory-adjustments', InventoryAdjustmentViewSet, basename='inventory-adjustment')
+router.register('orders', OrderViewSet, basename='order')
+router.register('exports', ExportViewSet, basename='export')
+router.register('inventory-changes', InventoryChangeFeedViewSet, basename='inventory-change')
 
 schema = get_schema_view(
     openapi.Info(
@@ -30,7 +46,10 @@ urlpatterns = [
     path('api/v1/docs', schema.with_ui('redoc', cache_timeout=0), name='schema_redoc'),
 
     path('api/v1/', include(router.urls)),
-    path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path(
+        'api/v1/token/', TokenObtainPairView.as_view(serializer_class=TokenObtainPairSerializer),
+        name='token_obtain_pair'
+    ),
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/v1/token/verify/', TokenVerifyView.as_view(), name='token_verify'),
 ]
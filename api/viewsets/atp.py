@@ -0,0 +1,30 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+
+from api.serializers.atp import AvailableToPromiseQuerySerializer, AvailableToPromiseSerializer
+from core.services.atp import available_to_promise_many
+
+
+class AvailableToPromiseViewSet(viewsets.ViewSet):
+    """
+    Available-to-promise stock of products, across all warehouses and lot codes or within one warehouse.
+    Served from the ATP cache.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = 'standard'
+
+    @swagger_auto_schema(
+        query_serializer=AvailableToPromiseQuerySerializer,
+        responses={200: AvailableToPromiseSerializer(many=True)},
+    )
+    def list(self, request):  # pylint: disable=no-self-use
+        query = AvailableToPromiseQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        warehouse_id = query.validated_data.get('warehouse')
+
+        available = available_to_promise_many(query.validated_data['products'], warehouse_id=warehouse_id)
+        return Response(AvailableToPromiseSerializer([
+            {'product': product_id, 'warehouse': warehouse_id, 'available': available[product_id]}
+            for product_id in query.validated_data['products']
+        ], many=True).data)
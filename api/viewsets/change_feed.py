@@ -0,0 +1,28 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+
+from api.serializers.change_feed import ChangeBatchSerializer, ChangeFeedQuerySerializer
+from core.services.change_feed import log_changes
+
+
+class InventoryChangeFeedViewSet(viewsets.ViewSet):
+    """
+    Inventory adjustment log entries after a cursor, oldest first. Start with `after=0` (or the last log id known),
+    then send the returned `cursor` as `after`; the cursor moves past the entries the filters leave out. With
+    `timeout` the request waits for the next change (long polling) rather than returning an empty batch.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    @swagger_auto_schema(query_serializer=ChangeFeedQuerySerializer, responses={200: ChangeBatchSerializer})
+    def list(self, request):  # pylint: disable=no-self-use
+        query = ChangeFeedQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        batch = log_changes(
+            query.validated_data['after'], limit=query.validated_data['limit'],
+            warehouse_id=query.validated_data.get('warehouse'), reasons=query.validated_data.get('reason'),
+            timeout=query.validated_data['timeout'],
+        )
+        # entries are returned as read, the JSON encoder formats their dates
+        return Response({'cursor': batch.cursor, 'results': batch.entries})
@@ -0,0 +1,58 @@
+import re
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import viewsets
+from rest_framework.exceptions import NotFound
+
+from api.permissions import IsSuperuser
+from api.serializers.exports import ExportQuerySerializer
+from core.services.exports import EXPORTS, export_ndjson
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+# fast rather than small, the JSON lines compress well at any level
+GZIP_LEVEL = 1
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    try:
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    finally:
+        chunks.close()
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """
+    Full table exports for analytics, `orders`, `line-items` and `inventory-adjustment-logs`, streamed as NDJSON
+    (gzipped when the client accepts it). Filter on `created_at__gte` / `created_at__lt` to pull a range.
+    """
+    permission_classes = (IsSuperuser,)
+    lookup_field = 'kind'
+    lookup_value_regex = '[a-z-]+'
+
+    @swagger_auto_schema(query_serializer=ExportQuerySerializer, responses={200: 'NDJSON lines'})
+    def retrieve(self, request, kind=None):  # pylint: disable=no-self-use
+        if kind not in EXPORTS:
+            raise NotFound(f'Unknown export, expected one of {", ".join(EXPORTS)}')
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        chunks = export_ndjson(
+            kind, created_from=query.validated_data.get('created_at__gte'),
+            created_to=query.validated_data.get('created_at__lt'),
+        )
+        filename = f'{kind}.ndjson'
+        gzipped = bool(ACCEPTS_GZIP.search(request.headers.get('Accept-Encoding', '')))
+        response = StreamingHttpResponse(_gzip(chunks) if gzipped else chunks, content_type='application/x-ndjson')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
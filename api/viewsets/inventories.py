@@ -0,0 +1,130 @@
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from rest_framework import permissions, serializers, viewsets
+
+from api.conditional import ConditionalGetMixin
+from api.filters import InventoryFilter
+from api.pagination import KeysetPagination
+from api.serializers.inventories import InventorySerializer
+from core.models import Inventory, InventoryCounterShard
+from core.services.counter_shards import COUNTERS, add_shard_totals, shard_totals
+from utils.serializers import select_serializer_fields
+
+# the `InventorySerializer` fields, selected with `values()`
+LIST_FIELDS = ('id', 'uuid', 'product', 'warehouse', 'lot_code', 'location', 'unordered', 'ordered', 'fulfilled',
+               'updated_at')
+LIST_EXPRESSIONS = {
+    'sku': F('product__sku'),
+    'product_name': F('product__name'),
+    'variant': F('product__variant'),
+    'product_type': F('product__product_type'),
+    'warehouse_code': F('warehouse__short_code'),
+    'lot_number': F('lot_code__lot_number'),
+    'location_label': F('location__label'),
+    'shard_count': F('product__counter_shards'),
+}
+# read besides the serialized fields, by the pagination, `get_object` and the conditional GET versions
+INSTANCE_FIELDS = ('updated_at', *COUNTERS, 'product__counter_shards')
+
+
+def _isoformat(value, current_timezone):
+    """
+    `serializers.DateTimeField` representation, with the full precision `updated_at__gt` polling needs to not see
+    the last row again, minus its per value timezone lookup
+    """
+    value = value.astimezone(current_timezone).isoformat()
+    return f'{value[:-6]}Z' if value.endswith('+00:00') else value
+
+
+class InventoryPagination(KeysetPagination):
+    ordering = ('updated_at', 'id')
+    max_page_size = 10000
+
+
+class InventoryViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Stock per product, warehouse and lot code, oldest update first. Poll for changes with `updated_at__gt` set to
+    the last `updated_at` seen minus `DELTA_SYNC_OVERLAP` (5 minutes), or follow the `next` cursor, and send back
+    the `ETag` of the response in `If-None-Match` to get a 304 when nothing changed. `updated_at` is stamped before
+    the write commits, a slow write can show up with an `updated_at` older than rows already seen: the overlap
+    returns the rows changed in that window again so such a write isn't missed. Consumers that need every change
+    exactly once in commit order follow the inventory change feed instead. Counters include the not yet folded
+    counter shards.
+    """
+    queryset = Inventory.objects.select_related('product', 'warehouse', 'lot_code', 'location')
+    serializer_class = InventorySerializer
+    filterset_class = InventoryFilter
+    pagination_class = InventoryPagination
+    permission_classes = (permissions.IsAuthenticated,)
+    throttle_scope = 'standard'
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(Inventory.objects.all())
+        return self.conditional_response(request, self.get_list_version(queryset), lambda: self._list(queryset))
+
+    def _list(self, queryset):
+        """
+        Rows are built from `values()`, without model instances nor per field serialization, unless relations are
+        expanded. Either way only the columns of the requested fields are read.
+        """
+        serializer = self.get_serializer()
+        if any(isinstance(field, serializers.BaseSerializer) for field in serializer.fields.values()):
+            inventories = self.paginate_queryset(select_serializer_fields(queryset, serializer, INSTANCE_FIELDS))
+            add_shard_totals({inventory.id: inventory for inventory in inventories})
+            return self.get_paginated_response(self.get_serializer(inventories, many=True).data)
+
+        names = set(serializer.fields)
+        counters = names.intersection(COUNTERS)
+        rows = self.paginate_queryset(queryset.values(
+            # the pagination reads the id and updated_at of the rows
+            *(name for name in LIST_FIELDS if name in names or name in ('id', 'updated_at')),
+            **{
+                name: expression for name, expression in LIST_EXPRESSIONS.items()
+                if name in names or name == 'shard_count' and counters
+            }
+        ))
+
+        sharded = [row['id'] for row in rows if row.get('shard_count')]
+        totals = shard_totals(sharded) if sharded else {}
+        current_timezone = timezone.get_current_timezone()
+        for row in rows:
+            if row.pop('shard_count', None) and row['id'] in totals:
+                for counter, total in zip(COUNTERS, totals[row['id']]):
+                    if counter in counters:
+                        row[counter] += total
+            row['updated_at'] = _isoformat(row['updated_at'], current_timezone)
+        response = self.get_paginated_response(rows)
+
+        hidden = {'id', 'updated_at'} - names
+        if hidden:
+            for row in rows:
+                for name in hidden:
+                    del row[name]
+        return response
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset
+        return select_serializer_fields(queryset, self.get_serializer(), INSTANCE_FIELDS)
+
+    def get_object(self):
+        inventory = super().get_object()
+        add_shard_totals({inventory.id: inventory})
+        return inventory
+
+    def get_list_version(self, queryset):
+        """The counter shards of the listed inventories are part of the version"""
+        (count, last_modified), _ = super().get_list_version(queryset)
+        shards = InventoryCounterShard.objects.filter(inventory__in=queryset).aggregate(
+            count=Count('pk'), last_modified=Max('updated_at')
+        )
+        components = (count, last_modified, shards['count'], shards['last_modified'])
+        return components, max(filter(None, (last_modified, shards['last_modified'])), default=None)
+
+    def get_object_version(self, inventory):
+        components, last_modified = super().get_object_version(inventory)
+        if inventory.product.counter_shards:
+            shards_modified = inventory.counter_shards.aggregate(last_modified=Max('updated_at'))['last_modified']
+            last_modified = max(filter(None, (last_modified, shards_modified)))
+        return (*components, *(getattr(inventory, counter) for counter in COUNTERS)), last_modified
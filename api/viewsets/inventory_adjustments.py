@@ -0,0 +1,40 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+
+from api.idempotency import idempotent
+from api.permissions import IsSuperuser
+from api.serializers.inventory_adjustments import AdjustmentSerializer, InventoryAdjustmentSerializer
+from core.services.inventory_adjustments import Adjustment, apply_adjustments
+
+
+class InventoryAdjustmentViewSet(viewsets.ViewSet):
+    """
+    Applies a batch of inventory adjustments, all or none of them. Send an `Idempotency-Key` header to make retries
+    of the request safe.
+    """
+    permission_classes = (IsSuperuser,)
+
+    @swagger_auto_schema(
+        request_body=AdjustmentSerializer(many=True),
+        responses={201: InventoryAdjustmentSerializer(many=True)},
+    )
+    @idempotent('inventory_adjustments')
+    def create(self, request):  # pylint: disable=no-self-use
+        data = AdjustmentSerializer(data=request.data, many=True)
+        data.is_valid(raise_exception=True)
+
+        adjustments = apply_adjustments([
+            Adjustment(
+                adjustment['inventory'], adjustment['reason'],
+                unordered_change=adjustment['unordered_change'],
+                ordered_change=adjustment['ordered_change'],
+                fulfilled_change=adjustment['fulfilled_change'],
+                order_id=adjustment.get('order'),
+                receipt_id=adjustment.get('receipt'),
+                line_item_id=adjustment.get('line_item'),
+                comment=adjustment.get('comment') or None,
+            )
+            for adjustment in data.validated_data
+        ], user=request.user)
+        return Response(InventoryAdjustmentSerializer(adjustments, many=True).data, status=status.HTTP_201_CREATED)
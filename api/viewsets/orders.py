@@ -0,0 +1,94 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from api.idempotency import idempotent
+from api.permissions import IsSuperuser
+from api.serializers.orders import OrderIntakeResultSerializer, OrderIntakeSerializer, OrderResultSerializer
+from core.services.order_intake import NewOrder, OrderResult, intake_orders
+
+MAX_ORDERS = 500
+
+
+def _new_order(data) -> NewOrder:
+    return NewOrder(
+        data['tracking_id'], dict(data['customer']),
+        [(line_item['product'], line_item['price'], line_item['quantity']) for line_item in data['line_items']],
+        print_priority=data['print_priority'],
+    )
+
+
+def _messages(detail, prefix=''):
+    """Flattens validation errors into `field.subfield: message` strings"""
+    if isinstance(detail, dict):
+        return [
+            message
+            for field, errors in detail.items()
+            for message in _messages(errors, f'{prefix}{field}.' if field != 'non_field_errors' else prefix)
+        ]
+    if isinstance(detail, list):
+        if all(isinstance(error, dict) for error in detail):
+            return [
+                message for index, errors in enumerate(detail) for message in _messages(errors, f'{prefix}{index}.')
+            ]
+        return [message for error in detail for message in _messages(error, prefix)]
+    return [f'{prefix[:-1]}: {detail}' if prefix else str(detail)]
+
+
+class OrderViewSet(viewsets.ViewSet):
+    """
+    Order intake: creates orders with their line items, and their customers when they aren't known yet (matched by
+    email, then phone). Send an `Idempotency-Key` header to make retries of the request safe.
+    """
+    permission_classes = (IsSuperuser,)
+
+    @swagger_auto_schema(request_body=OrderIntakeSerializer, responses={201: OrderResultSerializer})
+    @idempotent('orders')
+    def create(self, request):  # pylint: disable=no-self-use
+        data = OrderIntakeSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+
+        result, = intake_orders([_new_order(data.validated_data)], user=request.user)
+        if not result.created:
+            raise serializers.ValidationError(list(result.errors))
+        return Response(OrderResultSerializer(result).data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        request_body=OrderIntakeSerializer(many=True),
+        responses={201: OrderIntakeResultSerializer, 207: OrderIntakeResultSerializer},
+    )
+    @action(detail=False, methods=['post'])
+    @idempotent('order_intake')
+    def bulk(self, request):  # pylint: disable=no-self-use
+        """
+        Creates up to 500 orders in one transaction. Every order is validated on its own, the invalid ones are
+        reported in their result (207) and the others are created.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            raise serializers.ValidationError('A list of orders is required')
+        if len(request.data) > MAX_ORDERS:
+            raise serializers.ValidationError(f'At most {MAX_ORDERS} orders per request')
+
+        # one serializer for all the orders, its fields are built once
+        serializer = OrderIntakeSerializer()
+        results, indexes, orders = [None] * len(request.data), [], []
+        for index, item in enumerate(request.data):
+            try:
+                orders.append(_new_order(serializer.run_validation(item)))
+                indexes.append(index)
+            except serializers.ValidationError as exc:
+                tracking_id = item.get('tracking_id') if isinstance(item, dict) else None
+                results[index] = OrderResult(
+                    tracking_id if isinstance(tracking_id, str) else None, errors=tuple(_messages(exc.detail))
+                )
+        for index, result in zip(indexes, intake_orders(orders, user=request.user) if orders else []):
+            results[index] = result
+
+        created = sum(result.created for result in results)
+        return Response(
+            OrderIntakeResultSerializer({
+                'created': created, 'failed': len(results) - created, 'results': results,
+            }).data,
+            status=status.HTTP_201_CREATED if created == len(results) else status.HTTP_207_MULTI_STATUS,
+        )
@@ -0,0 +1,36 @@
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from api.idempotency import idempotent
+from api.permissions import IsSuperuser
+from api.serializers.receipts import ReceiptImportResultSerializer, ReceiptImportSerializer
+from core.services.receipt_import import import_receipt
+
+
+class ReceiptViewSet(viewsets.ViewSet):
+    """
+    Receipt import: the uploaded file is streamed into a new receipt, its line items and their stock, one chunk of
+    lines per transaction. Invalid rows are skipped and reported.
+    """
+    permission_classes = (IsSuperuser,)
+    parser_classes = (MultiPartParser,)
+
+    @swagger_auto_schema(
+        request_body=ReceiptImportSerializer,
+        responses={201: ReceiptImportResultSerializer},
+    )
+    @action(detail=False, methods=['post'], url_path='import')
+    @idempotent('receipt_import', atomic=False)
+    def import_file(self, request):  # pylint: disable=no-self-use
+        data = ReceiptImportSerializer(data=request.data)
+        data.is_valid(raise_exception=True)
+        upload = data.validated_data['file']
+
+        result = import_receipt(
+            upload.open('rb'), data.validated_data['warehouse'], po_number=data.validated_data.get('po_number') or None,
+            user=request.user, file_format=data.validated_data.get('format'),
+        )
+        return Response(ReceiptImportResultSerializer(result).data, status=status.HTTP_201_CREATED)
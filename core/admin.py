@@ -1,16 +1,26 @@
-from django.contrib import admin
+import os
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import AdminSplitDateTime
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
 from django.contrib.auth.admin import GroupAdmin as DefaultGroupAdmin
 from django.contrib.auth.models import Group
+from django.http import FileResponse
 from django.shortcuts import redirect
-from django.urls import reverse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from rest_framework.authtoken.admin import TokenAdmin as DefaultTokenAdmin
 from rest_framework.authtoken.models import Token, TokenProxy
 
 from core import models
+from core.services.allocation import allocate_orders
+from core.services.inventory_snapshots import stock_as_of
+from core.services.log_archive import ArchiveError
+from core.services.waves import plan_waves
 from utils.admin import CustomModelAdmin, EstimateCountAdminMixin, CSVActionMixin, ChoiceDropdownFilter, DropdownFilter, \
-    LastMonthDateFilter, MonthYearListFilter, RelatedDropdownFilter
+    LastMonthDateFilter, MonthYearListFilter, ReadOnlyMixin
 
 User = get_user_model()
 
@@ -59,9 +69,10 @@ class OrderAdmin(EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
                     'customer',
                     'internal_status',
                     'error_status',
+                    'pick_wave',
                     'created_at',
                     'created_by')
-    list_select_related = ['customer', 'created_by']
+    list_select_related = ['customer', 'created_by', 'pick_wave']
     list_filter = [
         ('internal_status', ChoiceDropdownFilter),
         ('error_status', ChoiceDropdownFilter),
@@ -71,7 +82,7 @@ class OrderAdmin(EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
     readonly_fields = ('created_by',)
 
     actions = CSVActionMixin.actions + [
-        'show_related_inventory_adjustments', 'show_related_line_items',
+        'show_related_inventory_adjustments', 'show_related_line_items', 'allocate_inventory', 'plan_pick_waves',
     ]
 
     def show_related_inventory_adjustments(self, request, queryset):
@@ -91,6 +102,27 @@ class OrderAdmin(EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
 
         return redirect(redirect_url)
 
+    def allocate_inventory(self, request, queryset):
+        result = allocate_orders(queryset, user=request.user)
+        self.message_user(
+            request,
+            f'{len(result.allocated_order_ids)} orders reserved, '
+            f'{len(result.missing_order_ids)} orders are missing inventory',
+            messages.WARNING if result.missing_order_ids else messages.SUCCESS,
+        )
+
+    allocate_inventory.short_description = 'Reserve inventory for the selected orders'
+
+    def plan_pick_waves(self, request, queryset):
+        plans = plan_waves(queryset, user=request.user)
+        self.message_user(
+            request,
+            f'{sum(len(plan.order_ids) for plan in plans)} orders planned in {len(plans)} pick waves',
+            messages.SUCCESS,
+        )
+
+    plan_pick_waves.short_description = 'Plan pick waves for the selected orders not yet picked'
+
 
 class InventoryAdmin(EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
     readonly_fields = (
@@ -227,7 +259,7 @@ class InventoryAdjustmentLogAdmin(EstimateCountAdminMixin, CSVActionMixin, Custo
 
     list_filter = [
         ('source_adjustment__reason', ChoiceDropdownFilter),
-        ('inventory__warehouse__short_code', RelatedDropdownFilter),
+        ('inventory__warehouse__short_code', DropdownFilter),
         ('created_at', MonthYearListFilter),
     ]
 
@@ -271,6 +303,87 @@ class InventoryAdjustmentLogAdmin(EstimateCountAdminMixin, CSVActionMixin, Custo
         return obj.inventory.warehouse.short_code
 
 
+class StockAsOfForm(forms.Form):
+    warehouse = forms.ModelChoiceField(queryset=models.Warehouse.objects.all())
+    at = forms.SplitDateTimeField(widget=AdminSplitDateTime(), label='As of')
+
+
+class InventorySnapshotAdmin(ReadOnlyMixin, EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
+    change_list_template = 'admin/core/inventorysnapshot/change_list.html'
+
+    search_fields = ['inventory__product__name', 'inventory__product__sku']
+
+    list_display = ('inventory', 'taken_at', 'log_high_water', 'unordered', 'ordered', 'fulfilled',)
+    list_select_related = ('inventory', 'inventory__product', 'inventory__warehouse',)
+
+    list_filter = [
+        ('inventory__warehouse__short_code', DropdownFilter),
+        ('taken_at', MonthYearListFilter),
+    ]
+
+    actions = CSVActionMixin.actions
+
+    def get_urls(self):
+        urls = [
+            path('stock-as-of/', self.admin_site.admin_view(self.stock_as_of_view),
+                 name=f'{self.model._meta.app_label}_inventorysnapshot_stock_as_of'),
+        ]
+        return urls + super().get_urls()
+
+    def stock_as_of_view(self, request):
+        form = StockAsOfForm(request.GET or None)
+        rows = []
+        if form.is_valid():
+            try:
+                stock = stock_as_of(form.cleaned_data['at'], warehouse=form.cleaned_data['warehouse'])
+            except ArchiveError as exc:
+                form.add_error('at', str(exc))
+                stock = {}
+            inventories = models.Inventory.objects.filter(id__in=stock).select_related(
+                'product', 'lot_code'
+            ).order_by('product__name', 'product__variant')
+            rows = [(inventory, stock[inventory.id]) for inventory in inventories]
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Stock as of',
+            'opts': self.model._meta,
+            'form': form,
+            'rows': rows,
+        }
+        return TemplateResponse(request, 'admin/core/inventorysnapshot/stock_as_of.html', context)
+
+
+class InventoryAdjustmentLogArchiveAdmin(ReadOnlyMixin, CustomModelAdmin):
+    list_display = ('month', 'row_count', 'first_log_id', 'last_log_id', 'sha256', 'created_at',)
+    actions = ['download_archive']
+
+    def download_archive(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Select a single month to download', level=messages.WARNING)
+            return None
+        archive = queryset.get()
+        try:
+            file = open(archive.path, 'rb')  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            self.message_user(request, f'The archive file {archive.path} is missing', level=messages.ERROR)
+            return None
+        return FileResponse(file, as_attachment=True, filename=os.path.basename(archive.path))
+
+    download_archive.short_description = 'Download archived month'
+
+
+class InventoryAdjustmentLogSummaryAdmin(ReadOnlyMixin, EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
+    search_fields = ['inventory__product__name', 'inventory__product__sku']
+    list_display = ('archive', 'inventory', 'row_count', 'unordered_change', 'ordered_change', 'fulfilled_change',)
+    list_select_related = ('archive', 'inventory', 'inventory__product', 'inventory__warehouse',)
+    list_filter = [
+        ('inventory__warehouse__short_code', DropdownFilter),
+    ]
+
+    actions = CSVActionMixin.actions
+
+
 # pylint: disable=no-self-use
 class ProductAdmin(CSVActionMixin, CustomModelAdmin):
     search_fields = ['sku', 'name', ]
@@ -301,6 +414,28 @@ class LocationAdmin(CSVActionMixin, CustomModelAdmin):
     list_select_related = ('warehouse', )
 
 
+class PickWaveAdmin(EstimateCountAdminMixin, CSVActionMixin, CustomModelAdmin):
+    list_display = ('__str__', 'warehouse', 'print_priority', 'order_count', 'unit_count', 'location_count',
+                    'created_at', 'created_by',)
+    list_select_related = ['warehouse', 'created_by']
+    list_filter = [
+        ('warehouse__short_code', DropdownFilter),
+        'print_priority',
+        ('created_at', LastMonthDateFilter),
+    ]
+    readonly_fields = ('order_count', 'unit_count', 'location_count', 'created_by',)
+
+    actions = CSVActionMixin.actions + ['show_orders']
+
+    def show_orders(self, request, queryset):
+        ids = list(queryset.values_list('id', flat=True))
+
+        redirect_url = reverse(f'admin:{self.model._meta.app_label}_order_changelist')
+        redirect_url += f"?pick_wave__in={','.join(map(str, ids))}"
+
+        return redirect(redirect_url)
+
+
 class LotCodeAdmin(CSVActionMixin, CustomModelAdmin):
     list_display = ['product', 'lot_number', ]
     search_fields = ['product__sku', 'product__name', ]
@@ -328,9 +463,13 @@ admin.site.register(models.Customer, CustomerAdmin)
 admin.site.register(models.Inventory, InventoryAdmin)
 admin.site.register(models.InventoryAdjustmentLog, InventoryAdjustmentLogAdmin)
 admin.site.register(models.InventoryAdjustment, InventoryAdjustmentAdmin)
+admin.site.register(models.InventoryAdjustmentLogArchive, InventoryAdjustmentLogArchiveAdmin)
+admin.site.register(models.InventoryAdjustmentLogSummary, InventoryAdjustmentLogSummaryAdmin)
+admin.site.register(models.InventorySnapshot, InventorySnapshotAdmin)
 admin.site.register(models.LineItem, LineItemAdmin)
 admin.site.register(models.Location, LocationAdmin)
 admin.site.register(models.LotCode, LotCodeAdmin)
 admin.site.register(models.Order, OrderAdmin)
+admin.site.register(models.PickWave, PickWaveAdmin)
 admin.site.register(models.Product, ProductAdmin)
 admin.site.register(models.Warehouse, WarehouseAdmin)
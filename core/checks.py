@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Tags, register
+
+from utils.cache import is_process_local
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The available-to-promise cache is incremented by the process committing a stock change, with a per process
+    cache every other process keeps serving its stale totals. Outside of DEBUG the default cache must be shared.
+    """
+    if settings.DEBUG or not is_process_local(caches['default']):
+        return []
+    return [Error(
+        'The default cache is local to each process, the available-to-promise totals would go stale',
+        hint='Point CACHE_URL at a shared cache (Redis or memcached)',
+        id='core.E001',
+    )]
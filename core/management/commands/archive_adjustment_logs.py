@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.log_archive import DELETE_BATCH_SIZE, ArchiveError, archivable_months, archive_month
+
+
+class Command(BaseCommand):
+    help = 'Moves closed months of inventory adjustment logs to gzip-CSV files and deletes them from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-months', type=int, default=3,
+            help='Number of closed months to keep in the database besides the current one',
+        )
+        parser.add_argument('--month', help='Archive only this month (YYYY-MM)')
+        parser.add_argument('--batch-size', type=int, default=DELETE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                months = [datetime.strptime(options['month'], '%Y-%m').date()]
+            except ValueError:
+                raise CommandError('--month must be formatted as YYYY-MM')
+        else:
+            months = archivable_months(options['keep_months'])
+
+        for month in months:
+            try:
+                archive = archive_month(month, batch_size=options['batch_size'])
+            except ArchiveError as exc:
+                raise CommandError(str(exc))
+            if archive:
+                self.stdout.write(f'{month:%Y-%m}: {archive.row_count} rows archived to {archive.path}')
+        self.stdout.write(self.style.SUCCESS(f'{len(months)} months processed'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.services.inventory_snapshots import SETTLE_SECONDS, build_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Snapshots the inventories changed since the last run, meant to be run periodically (e.g. nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settle-seconds', type=int, default=SETTLE_SECONDS,
+            help='Leave log rows younger than this for the next run',
+        )
+
+    def handle(self, *args, **options):
+        created = build_snapshots(settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} inventory snapshots'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.bulk_load import LOADERS, bulk_load
+
+
+class Command(BaseCommand):
+    help = 'Upserts products, customers, warehouses or locations from a CSV file with a header line, through COPY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(LOADERS))
+        parser.add_argument('path', help='CSV file, optionally gzip compressed')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as file:
+                result = bulk_load(options['kind'], file)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        seconds = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.rows} {options['kind']} rows loaded in {seconds:.1f}s "
+            f'({result.rows / max(seconds, 0.001):.0f} rows/s): {result.inserted} inserted, {result.updated} updated, '
+            f'{result.unchanged} unchanged'
+        ))
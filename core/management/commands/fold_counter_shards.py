@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.services.counter_shards import FOLD_BATCH_SIZE, fold_counter_shards
+
+
+class Command(BaseCommand):
+    help = 'Merges the inventory counter shards back into their inventories, meant to be run periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=FOLD_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        folded = fold_counter_shards(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{folded} inventories folded'))
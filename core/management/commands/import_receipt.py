@@ -0,0 +1,53 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Warehouse
+from core.services.receipt_import import CHUNK_SIZE, import_receipt
+
+
+class Command(BaseCommand):
+    help = 'Creates a receipt from a CSV or JSONL file of lines (sku, quantity, price, variant, lot_number)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file, optionally gzip compressed')
+        parser.add_argument('--warehouse', required=True, help='Id or short code of the receiving centre')
+        parser.add_argument('--po-number')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help='Guessed from the file name by default')
+        parser.add_argument('--report', help='Path of the CSV report of the rejected rows')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        warehouse = options['warehouse']
+        warehouses = Warehouse.objects.filter(deleted_at=None)
+        warehouse = (
+            warehouses.filter(id=int(warehouse)) if warehouse.isdigit() else warehouses.filter(short_code=warehouse)
+        ).first()
+        if warehouse is None:
+            raise CommandError(f"Warehouse {options['warehouse']} does not exist")
+
+        report = open(options['report'], 'w', newline='') if options['report'] else None
+        error_writer = None
+        if report:
+            error_writer = csv.writer(report)
+            error_writer.writerow(['line', 'error', 'row'])
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_receipt(
+                    file, warehouse, po_number=options['po_number'], file_format=options['format'],
+                    chunk_size=options['chunk_size'], error_writer=error_writer,
+                )
+        finally:
+            if report:
+                report.close()
+        seconds = time.monotonic() - started
+
+        for error in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f'line {error.line}: {error.error}'))
+        self.stdout.write(
+            f'Receipt {result.receipt.uuid}: {result.imported} of {result.rows} lines imported, '
+            f'{result.error_count} rejected, in {seconds:.1f}s ({result.rows / max(seconds, 0.001):.0f} lines/s)'
+        )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.services.partitions import MONTHS_AHEAD, PARTITIONED_MODELS, convert_to_partitioned, ensure_partitions, \
+    is_partitioned
+
+
+class Command(BaseCommand):
+    help = (
+        'Creates the upcoming monthly partitions of the adjustment tables, meant to be run periodically. '
+        'With --convert, first turns the (unpartitioned) adjustment tables into partitioned tables.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert', action='store_true',
+            help='Convert the unpartitioned adjustment tables, locks them while their rows are copied',
+        )
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD)
+
+    def handle(self, *args, **options):
+        for model in PARTITIONED_MODELS:
+            table = model._meta.db_table
+            if is_partitioned(model):
+                continue
+            if not options['convert']:
+                self.stdout.write(f'{table} is not partitioned, use --convert to partition it')
+                continue
+            self.stdout.write(f'Partitioning {table}...')
+            convert_to_partitioned(model, months_ahead=options['months_ahead'])
+
+        partitions = ensure_partitions(months_ahead=options['months_ahead'])
+        self.stdout.write(self.style.SUCCESS(f'{len(partitions)} upcoming partitions in place'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.services.waves import WAVE_MAX_ORDERS, WAVE_MAX_UNITS, plan_waves
+
+
+class Command(BaseCommand):
+    help = 'Groups the orders not yet picked into pick waves by print priority and shared locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-orders', type=int, default=WAVE_MAX_ORDERS)
+        parser.add_argument('--max-units', type=int, default=WAVE_MAX_UNITS)
+        parser.add_argument('--dry-run', action='store_true', help='Print the waves without creating them')
+
+    def handle(self, *args, **options):
+        plans = plan_waves(max_orders=options['max_orders'], max_units=options['max_units'],
+                           dry_run=options['dry_run'])
+        for plan in plans:
+            self.stdout.write(
+                f'warehouse {plan.warehouse_id} P{plan.print_priority}: {len(plan.order_ids)} orders, '
+                f'{plan.units} units, {len(plan.location_ids)} locations'
+            )
+        orders = sum(len(plan.order_ids) for plan in plans)
+        verb = 'would be planned' if options['dry_run'] else 'planned'
+        self.stdout.write(self.style.SUCCESS(f'{orders} orders {verb} in {len(plans)} waves'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.services.idempotency import PURGE_BATCH_SIZE, purge_expired_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = 'Deletes the expired idempotency keys, meant to be run periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        purged = purge_expired_idempotency_keys(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{purged} idempotency keys purged'))
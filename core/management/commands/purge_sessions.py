@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from utils.sessions import CLEAR_BATCH_SIZE, SessionStore
+
+
+class Command(BaseCommand):
+    help = 'Deletes the expired sessions in batches, meant to be run periodically'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CLEAR_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cleared = SessionStore.clear_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{cleared} expired sessions deleted'))
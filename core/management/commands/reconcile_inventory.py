@@ -0,0 +1,72 @@
+import csv
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.services.reconciliation import COUNTERS, PARTITIONS_PER_WORKER, id_range_partitions, reconcile, \
+    record_slippage, warehouse_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifies that the inventory counters equal the sum of their InventoryAdjustment changes, writes the '
+        'discrepancies to a CSV report and, with --fix, records inventory_slippage adjustments for them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument(
+            '--partition-by', choices=('id', 'warehouse'), default='id',
+            help='Split the work by inventory id ranges or by warehouse',
+        )
+        parser.add_argument(
+            '--partitions', type=int,
+            help=f'Number of inventory id ranges, defaults to {PARTITIONS_PER_WORKER} per worker',
+        )
+        parser.add_argument('--report', help='Path of the CSV report, defaults to a timestamped file in the cwd')
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Record inventory_slippage adjustments aligning the ledger with the counters',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        if options['partition_by'] == 'warehouse':
+            partitions = warehouse_partitions()
+        else:
+            partitions = id_range_partitions(options['partitions'] or workers * PARTITIONS_PER_WORKER)
+
+        started = time.monotonic()
+        inventories, discrepancies = 0, []
+        for result in reconcile(partitions, workers=workers):
+            inventories += result.inventories
+            discrepancies += result.discrepancies
+            self.stdout.write(
+                f'{result.partition.label}: {result.inventories} inventories, '
+                f'{len(result.discrepancies)} discrepancies in {result.seconds:.2f}s'
+            )
+        self.stdout.write(
+            f'{inventories} inventories reconciled in {len(partitions)} partitions '
+            f'with {workers} workers in {time.monotonic() - started:.2f}s'
+        )
+
+        report = options['report'] or f'inventory_reconciliation_{timezone.now():%Y%m%d%H%M%S}.csv'
+        with open(report, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow([
+                'inventory_id', 'warehouse_id', 'product_id',
+                *COUNTERS, *(f'ledger_{counter}' for counter in COUNTERS),
+                *(f'{counter}_difference' for counter in COUNTERS),
+            ])
+            for discrepancy in sorted(discrepancies):
+                writer.writerow([
+                    discrepancy.inventory_id, discrepancy.warehouse_id, discrepancy.product_id,
+                    *discrepancy.counters, *discrepancy.ledger, *discrepancy.differences,
+                ])
+        self.stdout.write(f'{len(discrepancies)} discrepancies written to {report}')
+
+        if options['fix'] and discrepancies:
+            corrections = record_slippage(discrepancies)
+            self.stdout.write(self.style.SUCCESS(f'{corrections} inventory_slippage adjustments recorded'))
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.token_versions import USER_STATE_TIMEOUT, revoke_tokens
+
+
+class Command(BaseCommand):
+    help = 'Revokes the JWTs issued so far to the given users, they have to obtain new ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='+')
+
+    def handle(self, *args, **options):
+        User = get_user_model()  # pylint: disable=invalid-name
+        users = dict(User._default_manager.filter(
+            **{f'{User.USERNAME_FIELD}__in': options['usernames']}
+        ).values_list(User.USERNAME_FIELD, 'pk'))
+        missing = set(options['usernames']) - set(users)
+        if missing:
+            raise CommandError(f'Unknown users: {", ".join(sorted(missing))}')
+
+        for username, user_id in users.items():
+            version = revoke_tokens(user_id)
+            self.stdout.write(f'{username}: tokens revoked, now at version {version}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} users processed, running servers reject their tokens within {USER_STATE_TIMEOUT}s'
+        ))
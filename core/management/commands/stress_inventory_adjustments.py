@@ -0,0 +1,82 @@
+import multiprocessing
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import Inventory, InventoryAdjustment
+from core.services.inventory_adjustments import Adjustment, apply_adjustments
+from core.services.reconciliation import Partition, reconcile_partition
+
+STRESS_COMMENT = 'Stress test'
+
+
+def _run_worker(args):
+    inventory_ids, batch_size, seconds, seed = args
+    rng = random.Random(seed)
+    batches, sign = 0, 1
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        # every other batch moves the stock back, the counters stay where they were
+        apply_adjustments([
+            Adjustment(
+                inventory_id, InventoryAdjustment.REASON_CHOICES.inventory_slippage,
+                unordered_change=-sign, ordered_change=sign, comment=STRESS_COMMENT,
+            )
+            for inventory_id in rng.sample(inventory_ids, batch_size)
+        ])
+        batches, sign = batches + 1, -sign
+    return batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Stress tests apply_adjustments: worker processes adjust random inventories of a small hot set for a while, '
+        'the throughput is reported per worker count and the counters are checked against the '
+        'InventoryAdjustment ledger afterwards. Writes adjustments, refuses to run in production.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+        parser.add_argument('--inventories', type=int, default=20, help='Size of the hot set of inventories')
+        parser.add_argument('--batch-size', type=int, default=5, help='Inventories adjusted per batch')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of the run of every worker count')
+
+    def handle(self, *args, **options):
+        if settings.IS_PROD:
+            raise CommandError('The stress test writes adjustments and must not run in production')
+        inventory_ids = list(Inventory.objects.order_by('id').values_list('id', flat=True)[:options['inventories']])
+        if len(inventory_ids) < options['batch_size']:
+            raise CommandError(f'At least {options["batch_size"]} inventories are needed')
+        # the hot set is the first inventories, a contiguous id range the reconciliation can check
+        partition = Partition(label='stress', first_id=inventory_ids[0], last_id=inventory_ids[-1])
+        before = {
+            discrepancy.inventory_id: discrepancy.differences
+            for discrepancy in reconcile_partition(partition).discrepancies
+        }
+
+        context = multiprocessing.get_context('fork')
+        for workers in options['workers']:
+            # forked workers must not share the parent's connections
+            connections.close_all()
+            with context.Pool(workers) as pool:
+                batches = sum(pool.map(_run_worker, [
+                    (inventory_ids, options['batch_size'], options['seconds'], seed) for seed in range(workers)
+                ]))
+            self.stdout.write(
+                f'{workers:>3} workers: {batches / options["seconds"]:.0f} batches/s, '
+                f'{batches * options["batch_size"] / options["seconds"]:.0f} adjustments/s'
+            )
+
+        after = {
+            discrepancy.inventory_id: discrepancy.differences
+            for discrepancy in reconcile_partition(partition).discrepancies
+        }
+        drifted = [
+            inventory_id for inventory_id in {*before, *after} if before.get(inventory_id) != after.get(inventory_id)
+        ]
+        if drifted:
+            raise CommandError(f'The counters of {len(drifted)} inventories drifted from the ledger: {sorted(drifted)}')
+        self.stdout.write(self.style.SUCCESS('The counters match the InventoryAdjustment ledger'))
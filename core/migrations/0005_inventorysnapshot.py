@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-17 03:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0004_auto_20220103_0531'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='receipt',
+            name='created_by',
+            field=models.ForeignKey(blank=True, default=None, null=True, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('log_high_water', models.IntegerField(db_index=True)),
+                ('taken_at', models.DateTimeField(db_index=True)),
+                ('unordered', models.IntegerField(default=0)),
+                ('ordered', models.IntegerField(default=0)),
+                ('fulfilled', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='snapshots', to='core.inventory')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inventorysnapshot',
+            index=models.Index(fields=['inventory', '-taken_at'], name='inventory_snapshot_lookup'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='inventorysnapshot',
+            unique_together={('inventory', 'log_high_water')},
+        ),
+    ]
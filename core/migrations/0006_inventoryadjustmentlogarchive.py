@@ -0,0 +1,43 @@
+# Generated by Django 3.2 on 2026-10-17 03:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_inventorysnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryAdjustmentLogArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the archived month', unique=True)),
+                ('path', models.CharField(max_length=512)),
+                ('sha256', models.CharField(max_length=64)),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('first_log_id', models.IntegerField(blank=True, null=True)),
+                ('last_log_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryAdjustmentLogSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row_count', models.PositiveIntegerField(default=0)),
+                ('unordered_change', models.IntegerField(default=0)),
+                ('ordered_change', models.IntegerField(default=0)),
+                ('fulfilled_change', models.IntegerField(default=0)),
+                ('archive', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='summaries', to='core.inventoryadjustmentlogarchive')),
+                ('inventory', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='core.inventory')),
+            ],
+            options={
+                'verbose_name_plural': 'inventory adjustment log summaries',
+                'unique_together': {('archive', 'inventory')},
+            },
+        ),
+    ]
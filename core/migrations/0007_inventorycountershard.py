@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-17 04:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_inventoryadjustmentlogarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='counter_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Spread the stock updates of hot inventories over this many sub-counters, 0 disables sharding'),
+        ),
+        migrations.CreateModel(
+            name='InventoryCounterShard',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('unordered', models.IntegerField(default=0)),
+                ('ordered', models.IntegerField(default=0)),
+                ('fulfilled', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='counter_shards', to='core.inventory')),
+            ],
+            options={
+                'unique_together': {('inventory', 'shard')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-17 04:27
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_pickwave'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('key', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('request_hash', models.UUIDField(editable=False)),
+                ('status_code', models.PositiveSmallIntegerField(default=None, null=True)),
+                ('response', models.JSONField(default=None, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
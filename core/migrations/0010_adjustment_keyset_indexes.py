@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_adj_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryadjustmentlog',
+            index=models.Index(fields=['created_at', 'id'], name='inventory_adj_log_keyset'),
+        ),
+    ]
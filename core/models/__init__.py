@@ -9,3 +9,9 @@ from .inventories import Inventory
 from .inventory_adjustments import InventoryAdjustment
 from .inventory_adjustment_logs import InventoryAdjustmentLog
 from .receipt import Receipt
+from .inventory_snapshots import InventorySnapshot
+from .inventory_adjustment_log_archives import InventoryAdjustmentLogArchive, InventoryAdjustmentLogSummary
+from .inventory_counter_shards import InventoryCounterShard
+from .pick_waves import PickWave
+from .idempotency_keys import IdempotencyKey
+from .user_token_versions import UserTokenVersion
@@ -0,0 +1,20 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """The response of a write request sent with an `Idempotency-Key` header, replayed to its retries"""
+
+    def __str__(self):
+        return f"{self.key} - {self.status_code}"
+
+    # hash of the user, the endpoint and the client supplied key
+    key = models.UUIDField(primary_key=True, editable=False)
+    # hash of the request payload, a key can't be reused for another request
+    request_hash = models.UUIDField(editable=False)
+    # None while the request is in progress
+    status_code = models.PositiveSmallIntegerField(null=True, default=None)
+    response = models.JSONField(null=True, default=None, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
@@ -13,6 +13,10 @@ class Inventory(models.Model):
                              condition=Q(lot_code=None),
                              name='unique_without_lot_code'),
         ]
+        indexes = [
+            # delta polling and keyset pagination of the inventory API
+            models.Index(fields=['updated_at', 'id'], name='inventory_updated_keyset'),
+        ]
         verbose_name_plural = "inventories"
 
     def __str__(self):
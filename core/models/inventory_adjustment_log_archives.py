@@ -0,0 +1,37 @@
+from django.db import models
+
+
+class InventoryAdjustmentLogArchive(models.Model):
+    """Manifest of one month of InventoryAdjustmentLog rows moved out of the database into a gzip-CSV file"""
+
+    def __str__(self):
+        return f"InvAdjLogArchive: {self.month:%Y-%m}"
+
+    month = models.DateField(unique=True, help_text='First day of the archived month')
+    path = models.CharField(max_length=512)
+    sha256 = models.CharField(max_length=64)
+    row_count = models.PositiveIntegerField(default=0)
+
+    first_log_id = models.IntegerField(null=True, blank=True)
+    last_log_id = models.IntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class InventoryAdjustmentLogSummary(models.Model):
+    """Per inventory totals of an archived month, so log totals still reconcile with the counters"""
+
+    class Meta:
+        unique_together = ('archive', 'inventory',)
+        verbose_name_plural = "inventory adjustment log summaries"
+
+    def __str__(self):
+        return f"InvAdjLogSummary: {self.inventory} @ {self.archive.month:%Y-%m}"
+
+    archive = models.ForeignKey('InventoryAdjustmentLogArchive', on_delete=models.PROTECT, related_name='summaries')
+    inventory = models.ForeignKey('Inventory', on_delete=models.PROTECT, null=True, blank=True)
+
+    row_count = models.PositiveIntegerField(default=0)
+    unordered_change = models.IntegerField(default=0)
+    ordered_change = models.IntegerField(default=0)
+    fulfilled_change = models.IntegerField(default=0)
@@ -2,6 +2,12 @@ from django.db import models
 
 
 class InventoryAdjustmentLog(models.Model):
+    class Meta:
+        indexes = [
+            # keyset pagination
+            models.Index(fields=['created_at', 'id'], name='inventory_adj_log_keyset'),
+        ]
+
     inventory = models.ForeignKey('Inventory', on_delete=models.PROTECT,
                                   null=True, blank=True)
 
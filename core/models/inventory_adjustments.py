@@ -15,6 +15,12 @@ REASON_CHOICES = Choices(
 
 
 class InventoryAdjustment(models.Model):
+    class Meta:
+        indexes = [
+            # keyset pagination
+            models.Index(fields=['created_at', 'id'], name='inventory_adj_keyset'),
+        ]
+
     REASON_CHOICES = REASON_CHOICES
 
     def __str__(self):
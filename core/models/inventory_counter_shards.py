@@ -0,0 +1,24 @@
+from django.db import models
+
+
+class InventoryCounterShard(models.Model):
+    """
+    Sub-counter of an Inventory whose product has `counter_shards` enabled. Writers add their changes to a random
+    shard instead of locking the inventory row, the counters of the inventory are its own plus the sum of its
+    shards until `manage.py fold_counter_shards` merges the shards back.
+    """
+
+    class Meta:
+        unique_together = ('inventory', 'shard',)
+
+    def __str__(self):
+        return f"InvCounterShard: {self.inventory} #{self.shard}"
+
+    inventory = models.ForeignKey('Inventory', on_delete=models.PROTECT, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+
+    unordered = models.IntegerField(default=0)
+    ordered = models.IntegerField(default=0)
+    fulfilled = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class InventorySnapshot(models.Model):
+    """
+    Counters of an inventory as they were once every `InventoryAdjustmentLog` up to `log_high_water` was applied.
+    A snapshot run only writes rows for inventories that changed since the previous run.
+    """
+
+    class Meta:
+        unique_together = ('inventory', 'log_high_water',)
+        indexes = [
+            models.Index(fields=['inventory', '-taken_at'], name='inventory_snapshot_lookup'),
+        ]
+
+    def __str__(self):
+        return f"InvSnapshot: {self.inventory} @ {self.taken_at}"
+
+    inventory = models.ForeignKey('Inventory', on_delete=models.PROTECT, related_name='snapshots')
+
+    # id of the last InventoryAdjustmentLog included in this snapshot
+    log_high_water = models.IntegerField(db_index=True)
+    # created_at of the newest log row included in the snapshot run
+    taken_at = models.DateTimeField(db_index=True)
+
+    unordered = models.IntegerField(default=0)
+    ordered = models.IntegerField(default=0)
+    fulfilled = models.IntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
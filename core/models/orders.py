@@ -48,6 +48,11 @@ class Order(CustomModel):
         help_text='Set the priority for this order to be packed - 1 is the highest priority, 10 is the lowest'
     )
 
+    pick_wave = models.ForeignKey(
+        'PickWave', on_delete=models.SET_NULL,
+        null=True, default=None, blank=True, related_name='orders'
+    )
+
     created_by = models.ForeignKey(
         User, on_delete=models.PROTECT,
         null=True, default=None, blank=True
@@ -0,0 +1,24 @@
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class PickWave(models.Model):
+    """A batch of orders of the same warehouse and print priority picked in a single walk"""
+
+    def __str__(self):
+        return f"Wave {self.id} - P{self.print_priority}"
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    warehouse = models.ForeignKey('Warehouse', on_delete=models.PROTECT, null=True, blank=True)
+    print_priority = models.PositiveSmallIntegerField()
+
+    order_count = models.PositiveIntegerField(default=0)
+    unit_count = models.PositiveIntegerField(default=0)
+    location_count = models.PositiveIntegerField(default=0)
+
+    created_by = models.ForeignKey(User, on_delete=models.PROTECT, null=True, default=None, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -22,6 +22,10 @@ class Product(models.Model):
         choices=PRODUCT_TYPE, default=PRODUCT_TYPE.paper
     )
     variant = models.CharField(db_index=True, max_length=255)
+    counter_shards = models.PositiveSmallIntegerField(
+        default=0,
+        help_text='Spread the stock updates of hot inventories over this many sub-counters, 0 disables sharding'
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,16 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class UserTokenVersion(models.Model):
+    """The version of a user's JWTs, the tokens issued with an older version are revoked"""
+
+    def __str__(self):
+        return f"{self.user} - v{self.version}"
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='token_version')
+    version = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
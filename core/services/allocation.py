@@ -0,0 +1,158 @@
+"""
+Bulk reservation of inventory for orders.
+
+`allocate_orders` reserves the line item quantities of a batch of orders in `print_priority`, `created_at` order.
+The working set (line items, candidate inventories and their lot codes) is loaded with a handful of queries, the
+inventories are locked once and the allocation itself runs in memory: every line item takes stock across warehouses
+from the oldest lot first (first-expired, first-out, lots are dated by their creation) and unlotted stock last.
+An order is reserved entirely or not at all, orders that can't be filled get `error_status='missing_inventory'`.
+"""
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from typing import List, NamedTuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from core.models import Inventory, InventoryAdjustment, LineItem, LotCode, Order
+from core.models.orders import ERROR_STATUS_CHOICES, INTERNAL_STATUS_CHOICES
+from core.services.counter_shards import add_shard_totals
+from core.services.inventory_adjustments import Adjustment, apply_adjustments, lock_inventories
+from utils.db import retry_on_serialization_failure
+
+ORDER_BATCH_SIZE = 2000
+
+UNLOTTED = datetime.max.replace(tzinfo=dt_timezone.utc)
+
+
+class AllocationResult(NamedTuple):
+    allocated_order_ids: List[int]
+    missing_order_ids: List[int]
+    adjustments: int
+
+
+def allocatable_orders(orders=None):
+    """Orders (of the given queryset) that are still open and don't hold a reservation yet"""
+    orders = Order.objects.all() if orders is None else orders
+    reservations = InventoryAdjustment.objects.filter(
+        order_id=OuterRef('id'), reason=InventoryAdjustment.REASON_CHOICES.order_reserved
+    )
+    return orders.exclude(
+        internal_status__in=(INTERNAL_STATUS_CHOICES.delivered, INTERNAL_STATUS_CHOICES.cancelled)
+    ).exclude(Exists(reservations))
+
+
+def allocate_orders(orders=None, user=None, batch_size=ORDER_BATCH_SIZE) -> AllocationResult:
+    """
+    Reserves stock for the allocatable orders of the queryset, highest priority and oldest first.
+    Every batch of orders is allocated in its own transaction.
+    """
+    order_ids = list(
+        allocatable_orders(orders).order_by('print_priority', 'created_at', 'id').values_list('id', flat=True)
+    )
+    allocated, missing, adjustments = [], [], 0
+    for start in range(0, len(order_ids), batch_size):
+        result = _allocate_batch(order_ids[start:start + batch_size], user)
+        allocated += result.allocated_order_ids
+        missing += result.missing_order_ids
+        adjustments += result.adjustments
+    return AllocationResult(allocated, missing, adjustments)
+
+
+@retry_on_serialization_failure
+def _allocate_batch(order_ids: List[int], user) -> AllocationResult:
+    with transaction.atomic():
+        # re-checked under the order locks, a concurrent run may have reserved some of them already
+        locked = set(allocatable_orders(
+            Order.objects.select_for_update().filter(id__in=order_ids).order_by('id')
+        ).values_list('id', flat=True))
+        order_ids = [order_id for order_id in order_ids if order_id in locked]
+
+        line_items = defaultdict(list)
+        for line_item_id, order_id, product_id, quantity in LineItem.objects.filter(
+            order_id__in=order_ids
+        ).order_by('id').values_list('id', 'order_id', 'product_id', 'quantity'):
+            line_items[order_id].append((line_item_id, product_id, quantity))
+
+        stock = _lock_stock({product_id for items in line_items.values() for _, product_id, _ in items})
+
+        # orders without line items have nothing to reserve
+        order_ids = [order_id for order_id in order_ids if line_items[order_id]]
+
+        reservations, missing = [], []
+        for order_id in order_ids:
+            takes = _allocate_order(line_items[order_id], stock)
+            if takes is None:
+                missing.append(order_id)
+                continue
+            reservations += [
+                Adjustment(
+                    inventory_id, InventoryAdjustment.REASON_CHOICES.order_reserved,
+                    unordered_change=-quantity, ordered_change=quantity,
+                    order_id=order_id, line_item_id=line_item_id,
+                )
+                for line_item_id, inventory_id, quantity in takes
+            ]
+
+        apply_adjustments(reservations, user=user)
+
+        missing_ids = set(missing)
+        allocated = [order_id for order_id in order_ids if order_id not in missing_ids]
+        # update() skips `auto_now`
+        now = timezone.now()
+        Order.objects.filter(id__in=missing).update(error_status=ERROR_STATUS_CHOICES.missing_inventory, updated_at=now)
+        Order.objects.filter(id__in=allocated, error_status=ERROR_STATUS_CHOICES.missing_inventory).update(
+            error_status=None, updated_at=now
+        )
+    return AllocationResult(allocated, missing, len(reservations))
+
+
+def _lock_stock(product_ids):
+    """
+    Locks the inventories holding unordered stock of the products in active warehouses and returns, per product,
+    a list of [inventory id, available quantity] pairs, oldest lot first
+    """
+    candidates = Inventory.objects.filter(
+        Q(unordered__gt=0) | Q(product__counter_shards__gt=0), product_id__in=product_ids, warehouse__deleted_at=None
+    ).values_list('id', 'lot_code_id')
+    candidates = dict(candidates)
+    if not candidates:
+        return {}
+    inventories = lock_inventories(candidates)
+    add_shard_totals(inventories)
+    lots = dict(
+        LotCode.objects.filter(id__in={lot_id for lot_id in candidates.values() if lot_id}).values_list(
+            'id', 'created_at'
+        )
+    )
+
+    stock = defaultdict(list)
+    for inventory in sorted(
+        inventories.values(), key=lambda inventory: (lots.get(inventory.lot_code_id, UNLOTTED), inventory.id)
+    ):
+        if inventory.unordered > 0:
+            stock[inventory.product_id].append([inventory.id, inventory.unordered])
+    return stock
+
+
+def _allocate_order(line_items, stock):
+    """
+    Takes the quantities of all the line items from the stock, returns the (line item id, inventory id, quantity)
+    takes or None, leaving the stock untouched, when any line item can't be filled
+    """
+    takes = []
+    for line_item_id, product_id, quantity in line_items:
+        for entry in stock.get(product_id, ()):
+            if not quantity:
+                break
+            taken = min(quantity, entry[1])
+            if taken:
+                entry[1] -= taken
+                quantity -= taken
+                takes.append((line_item_id, entry, taken))
+        if quantity:
+            for _, entry, taken in takes:
+                entry[1] += taken
+            return None
+    return [(line_item_id, entry[0], taken) for line_item_id, entry, taken in takes]
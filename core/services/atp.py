@@ -0,0 +1,89 @@
+"""
+Available-to-promise (ATP) cache.
+
+The ATP of a product is the sum of `Inventory.unordered` (counter shards included) over all its warehouses and lot
+codes. It is cached per product and per product + warehouse. `apply_adjustments` reports the unordered deltas it
+applies and the cached values are incremented once the transaction commits, so a rolled back transaction never
+touches the cache. The cache must be shared by all the processes (see `core.checks`), a per process cache isn't
+incremented by the others. A miss falls back to an aggregate query whose result is added to the cache.
+
+A miss that is filled while another transaction commits can leave an entry off by that transaction's delta, the
+timeout bounds how long such an entry lives. The ATP is meant for quick availability checks, reservations still
+lock the inventories and check the counters themselves.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from core.models import Inventory, InventoryCounterShard
+
+ATP_CACHE_TIMEOUT = 60 * 15
+
+
+def cache_key(product_id, warehouse_id=None) -> str:
+    if warehouse_id is None:
+        return f'atp:{product_id}'
+    return f'atp:{product_id}:{warehouse_id}'
+
+
+def available_to_promise(product_id, warehouse_id=None) -> int:
+    return available_to_promise_many([product_id], warehouse_id=warehouse_id)[product_id]
+
+
+def available_to_promise_many(product_ids: Iterable[int], warehouse_id=None) -> Dict[int, int]:
+    """Returns the ATP of every product keyed by product id, the misses are loaded with a single query"""
+    product_ids = set(product_ids)
+    keys = {cache_key(product_id, warehouse_id): product_id for product_id in product_ids}
+    cached = cache.get_many(keys)
+    available = {keys[key]: value for key, value in cached.items()}
+
+    missing = product_ids - set(available)
+    if missing:
+        inventories = Inventory.objects.filter(product_id__in=missing)
+        if warehouse_id is not None:
+            inventories = inventories.filter(warehouse_id=warehouse_id)
+        shards = InventoryCounterShard.objects.filter(inventory__in=inventories)
+        totals = defaultdict(int)
+        for product_id, total in [
+            *inventories.values('product_id').annotate(total=Sum('unordered')).order_by().values_list(
+                'product_id', 'total'
+            ),
+            *shards.values('inventory__product_id').annotate(total=Sum('unordered')).order_by().values_list(
+                'inventory__product_id', 'total'
+            ),
+        ]:
+            totals[product_id] += total or 0
+        for product_id in missing:
+            available[product_id] = totals[product_id]
+            # add, not set: an entry incremented in the meantime is more recent than this read
+            cache.add(cache_key(product_id, warehouse_id), available[product_id], ATP_CACHE_TIMEOUT)
+    return available
+
+
+def record_unordered_changes(changes: Dict[Tuple[int, int], int]):
+    """
+    Schedules the increments of the cached ATP by the unordered changes keyed by (product id, warehouse id).
+    Outside of a transaction they are applied right away.
+    """
+    changes = {key: change for key, change in changes.items() if change}
+    if changes:
+        transaction.on_commit(lambda: _increment(changes))
+
+
+def _increment(changes: Dict[Tuple[int, int], int]):
+    increments = defaultdict(int)
+    for (product_id, warehouse_id), change in changes.items():
+        increments[cache_key(product_id)] += change
+        increments[cache_key(product_id, warehouse_id)] += change
+
+    for key, change in increments.items():
+        if not change:
+            continue
+        try:
+            cache.incr(key, change)
+        except ValueError:
+            # not cached, the next read loads it from the database
+            pass
@@ -0,0 +1,263 @@
+"""
+Bulk loading of master data.
+
+`bulk_load` streams a CSV file (with a header line) into a temporary table through `COPY FROM STDIN`, normalizes it
+into the shape of the target table in one `INSERT ... SELECT` (blank values become NULL, model defaults are filled
+in, `Location.label` is computed like `Location._get_label`), validates it, and upserts it with two set based
+statements: an `UPDATE` of the existing rows whose loaded columns changed and an `INSERT` of the new ones. The last
+line wins when the file repeats a key. Everything happens in one transaction.
+
+Rows are matched on `Product(sku, name, product_type, variant)` and `Location(warehouse, aisle, column, level)`,
+their unique constraints (also used as the `ON CONFLICT` target), on `Customer.email` and on `Warehouse.short_code`.
+Customers without an email and warehouses without a short code are always inserted. Neither of the latter has a
+unique constraint, so their table is locked against concurrent writes for the duration of the load.
+"""
+import csv
+import gzip
+from typing import Dict, NamedTuple, Tuple, Type
+
+from django.db import DataError, IntegrityError, connection, models, transaction
+from django.utils import timezone
+
+from core.models import Customer, Location, Product, Warehouse
+
+STAGING_TABLE = 'bulk_load_staging'
+SOURCE_TABLE = 'bulk_load_source'
+MAX_REPORTED_ERRORS = 10
+# checked by a CHECK constraint, reported per line before it fails the whole load
+POSITIVE_FIELD_TYPES = ('PositiveIntegerField', 'PositiveSmallIntegerField', 'PositiveBigIntegerField')
+
+
+class Loader(NamedTuple):
+    model: Type[models.Model]
+    # columns accepted in the file
+    columns: Tuple[str, ...]
+    # model fields the loaded rows are matched on
+    key: Tuple[str, ...]
+    # whether the key is a unique constraint, NULLs then match each other like in `unique_together` validation
+    unique: bool
+
+
+LOADERS: Dict[str, Loader] = {
+    'products': Loader(
+        Product, ('sku', 'name', 'product_type', 'variant', 'counter_shards'),
+        ('sku', 'name', 'product_type', 'variant'), unique=True,
+    ),
+    'customers': Loader(
+        Customer, (
+            'name', 'email', 'phone', 'address_1', 'address_2', 'city', 'state', 'zip_code', 'latitude', 'longitude',
+        ),
+        ('email',), unique=False,
+    ),
+    'warehouses': Loader(
+        Warehouse, (
+            'short_code', 'name', 'description', 'business_name', 'address_1', 'address_2', 'city', 'state',
+            'zip_code', 'phone', 'latitude', 'longitude', 'location_type',
+        ),
+        ('short_code',), unique=False,
+    ),
+    # `warehouse` is the warehouse's short code
+    'locations': Loader(
+        Location, ('warehouse', 'aisle', 'column', 'level', 'label'),
+        ('warehouse', 'aisle', 'column', 'level'), unique=True,
+    ),
+}
+
+
+class LoadResult(NamedTuple):
+    rows: int
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _open(file):
+    """The binary file, decompressed on the fly when gzipped"""
+    if (getattr(file, 'name', '') or '').endswith('.gz'):
+        return gzip.GzipFile(fileobj=file)
+    return file
+
+
+def _read_header(file, loader: Loader):
+    """:raise ValueError"""
+    header = next(csv.reader([file.readline().decode('utf-8-sig')]), [])
+    columns = [column.strip() for column in header]
+    unknown = [column for column in columns if column not in loader.columns]
+    if unknown or not columns:
+        raise ValueError(f'Unknown columns {unknown}, expected some of {list(loader.columns)}')
+    if len(set(columns)) != len(columns):
+        raise ValueError('Duplicated columns in the header')
+    return columns
+
+
+def _fields(loader: Loader):
+    """The concrete fields written by the load, the auto incremented primary key excepted"""
+    return [
+        field for field in loader.model._meta.concrete_fields
+        if not isinstance(field, (models.AutoField, models.BigAutoField))
+    ]
+
+
+def _source_expressions(loader: Loader, columns, now):
+    """(column, SQL expression over the staging row `s`, params) of every field of the target table"""
+    expressions = []
+    for field in _fields(loader):
+        column = field.column
+        if field.name == 'warehouse' and loader.model is Location:
+            expressions.append((column, (
+                f'(SELECT id FROM {_quote(Warehouse._meta.db_table)} '
+                f'WHERE short_code = NULLIF(s.warehouse, \'\') AND deleted_at IS NULL ORDER BY id LIMIT 1)'
+            ), []))
+            continue
+        if field.name == 'label' and loader.model is Location:
+            components = ', '.join(f'NULLIF(s.{_quote(name)}, \'\')' for name in ('aisle', 'column', 'level'))
+            given = 'NULLIF(s.label, \'\')' if 'label' in columns else 'NULL'
+            expressions.append((column, f'COALESCE({given}, NULLIF(concat_ws(\' \', {components}), \'\'))', []))
+            continue
+        if field.primary_key and isinstance(field, models.UUIDField):
+            expressions.append((column, 'gen_random_uuid()', []))
+            continue
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            expressions.append((column, '%s', [now]))
+            continue
+
+        # character columns stay text here, their length is validated before they are written
+        db_type = 'text' if field.get_internal_type() in ('CharField', 'EmailField') else field.db_type(connection)
+        expression, params = 'NULL', []
+        if field.name in columns:
+            expression = f'NULLIF(s.{_quote(field.name)}, \'\')'
+        if not field.null:
+            if field.has_default():
+                expression, params = f'COALESCE({expression}::{db_type}, %s)', [field.get_default()]
+            elif field.blank:
+                expression = f'COALESCE({expression}, \'\')'
+        expressions.append((column, f'({expression})::{db_type}', params))
+    return expressions
+
+
+def _errors(cursor, loader: Loader):
+    """Line numbers and messages of the first invalid normalized rows"""
+    checks = []
+    for field in _fields(loader):
+        column = _quote(field.column)
+        if field.name == 'warehouse' and loader.model is Location:
+            checks.append((f'{column} IS NULL', [], 'unknown warehouse'))
+        elif not field.null:
+            checks.append((f'{column} IS NULL', [], f'{field.name} is required'))
+        if field.choices:
+            choices = tuple(str(value) for value, _ in field.flatchoices)
+            checks.append((f'{column} NOT IN %s', [choices], f'{field.name} must be one of {", ".join(choices)}'))
+        if field.get_internal_type() in POSITIVE_FIELD_TYPES:
+            checks.append((f'{column} < 0', [], f'{field.name} must be at least 0'))
+        if field.get_internal_type() in ('CharField', 'EmailField'):
+            checks.append((
+                f'length({column}) > %s', [field.max_length],
+                f'{field.name} is longer than {field.max_length} characters'
+            ))
+
+    errors = []
+    for condition, params, message in checks:
+        cursor.execute(
+            f'SELECT line FROM {SOURCE_TABLE} WHERE {condition} ORDER BY line LIMIT {MAX_REPORTED_ERRORS}', params
+        )
+        errors += [(line, message) for line, in cursor.fetchall()]
+    return sorted(errors)[:MAX_REPORTED_ERRORS]
+
+
+def _match(loader: Loader, fields):
+    """SQL condition matching an existing row `t` with a loaded row `d` on the key"""
+    conditions = []
+    for field in fields:
+        column = _quote(field.column)
+        if loader.unique and field.null:
+            conditions.append(f"COALESCE(t.{column}, '') = COALESCE(d.{column}, '')")
+        else:
+            conditions.append(f't.{column} = d.{column}')
+    return ' AND '.join(conditions)
+
+
+def bulk_load(kind, file) -> LoadResult:
+    """
+    Loads a CSV file (binary file object, gzip compressed when named *.gz) of `kind` rows, see `LOADERS`.
+    :raise ValueError for an invalid file, nothing is loaded then
+    """
+    loader = LOADERS[kind]
+    file = _open(file)
+    columns = _read_header(file, loader)
+    model_meta = loader.model._meta
+    table = _quote(model_meta.db_table)
+    fields = _fields(loader)
+    key = [model_meta.get_field(name) for name in loader.key]
+    updated_fields = [field for field in fields if field.name in columns and field not in key]
+    updated_at = [field for field in fields if getattr(field, 'auto_now', False)]
+
+    expressions = _source_expressions(loader, columns, timezone.now())
+    insert_columns = ', '.join(_quote(column) for column, _, _ in expressions)
+    distinct = [_quote(field.column) for field in key]
+    if not loader.unique:
+        # rows without a key are never matched, nor deduplicated
+        distinct += [f'CASE WHEN {_quote(field.column)} IS NULL THEN line END' for field in key]
+    distinct = ', '.join(distinct)
+
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not loader.unique:
+                cursor.execute(f'LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {STAGING_TABLE} '
+                f'(line bigserial, {", ".join(f"{_quote(column)} text" for column in loader.columns)}) '
+                f'ON COMMIT DROP'
+            )
+            cursor.copy_expert(
+                f'COPY {STAGING_TABLE} ({", ".join(_quote(column) for column in columns)}) FROM STDIN '
+                f'WITH (FORMAT csv)',
+                file
+            )
+            rows = cursor.rowcount
+
+            # line numbers of the file, the header being line 1
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {SOURCE_TABLE} ON COMMIT DROP AS SELECT s.line + 1 AS line, '
+                f'{", ".join(f"{expression} AS {_quote(column)}" for column, expression, _ in expressions)} '
+                f'FROM {STAGING_TABLE} s',
+                [param for _, _, params in expressions for param in params]
+            )
+            errors = _errors(cursor, loader)
+            if errors:
+                raise ValueError('\n'.join(f'line {line}: {message}' for line, message in errors))
+
+            # the last line of a key wins
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {SOURCE_TABLE}_rows ON COMMIT DROP AS SELECT DISTINCT ON ({distinct}) * '
+                f'FROM {SOURCE_TABLE} ORDER BY {distinct}, line DESC'
+            )
+            distinct_rows = cursor.rowcount
+
+            updated = 0
+            if updated_fields:
+                assignments = [f'{_quote(field.column)} = d.{_quote(field.column)}' for field in updated_fields]
+                assignments += [f'{_quote(field.column)} = d.{_quote(field.column)}' for field in updated_at]
+                cursor.execute(
+                    f'UPDATE {table} t SET {", ".join(assignments)} FROM {SOURCE_TABLE}_rows d '
+                    f'WHERE {_match(loader, key)} '
+                    f'AND ({", ".join(f"t.{_quote(field.column)}" for field in updated_fields)}) IS DISTINCT FROM '
+                    f'({", ".join(f"d.{_quote(field.column)}" for field in updated_fields)})'
+                )
+                updated = cursor.rowcount
+
+            on_conflict = ''
+            if loader.unique:
+                on_conflict = f'ON CONFLICT ({", ".join(_quote(field.column) for field in key)}) DO NOTHING'
+            cursor.execute(
+                f'INSERT INTO {table} ({insert_columns}) SELECT {insert_columns} FROM {SOURCE_TABLE}_rows d '
+                f'WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE {_match(loader, key)}) {on_conflict}'
+            )
+            inserted = cursor.rowcount
+    except (DataError, IntegrityError) as exc:
+        raise ValueError(f'Invalid value: {str(exc).strip()}') from exc
+
+    return LoadResult(rows, inserted, updated, distinct_rows - inserted - updated)
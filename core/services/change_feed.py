@@ -0,0 +1,134 @@
+"""
+Change feed over `InventoryAdjustmentLog`.
+
+Consumers keep the id of the last log entry they processed and ask for the entries after it, so a sync costs
+O(changes) rather than O(table). Log ids come from a sequence when the row is inserted, not when it is committed:
+a transaction still open may commit a lower id than entries already visible, and a consumer that moved past it would
+never see it. The feed therefore only serves ids up to `settled_log_id()`, below which no entry can appear anymore.
+
+Every writer of log rows inserts the adjustments first, so a transaction holds a transaction id before it takes
+log ids. A sequence value read before a snapshot is settled once all the transactions in progress in that
+snapshot have ended. The watermark is computed per process, at most once per `SETTLE_INTERVAL`, and shared by all
+the long polling requests of the process; it lags behind the longest write transaction.
+"""
+import threading
+import time
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple
+
+from django.db import connection
+from django.db.models import F
+
+from core.models import InventoryAdjustmentLog
+
+MAX_BATCH_SIZE = 1000
+MAX_TIMEOUT = 30
+POLL_INTERVAL = 0.2
+SETTLE_INTERVAL = 0.1
+# sequence values kept waiting behind a long transaction
+MAX_PENDING = 100
+
+ENTRY_FIELDS = (
+    'id', 'inventory', 'source_adjustment', 'unordered_change', 'ordered_change', 'fulfilled_change',
+    'absolute_post_unordered', 'absolute_post_ordered', 'absolute_post_fulfilled', 'created_at',
+)
+ENTRY_EXPRESSIONS = {
+    'warehouse': F('inventory__warehouse'),
+    'product': F('inventory__product'),
+    'lot_code': F('inventory__lot_code'),
+    'reason': F('source_adjustment__reason'),
+}
+
+
+class ChangeBatch(NamedTuple):
+    entries: List[dict]
+    # the id to ask the next batch after
+    cursor: int
+
+
+class _Watermark:
+    """The settled log id, with the sequence values waiting for their transactions to end"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.settled = 0
+        self.checked_at = 0.0
+        # (sequence value, transactions in progress when it was read)
+        self.pending: List[Tuple[int, List[str]]] = []
+
+    def refresh(self, cursor):
+        cursor.execute(
+            'SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM '
+            f'{_sequence_name()}'
+        )
+        last_id, = cursor.fetchone()
+        # a new statement, its snapshot is taken after the sequence read
+        cursor.execute('SELECT array_agg(xid::text) FROM pg_snapshot_xip(pg_current_snapshot()) xid')
+        self.pending.append((last_id, cursor.fetchone()[0] or []))
+        if len(self.pending) > MAX_PENDING:
+            # the oldest values settle first, the newest cover the most ids
+            del self.pending[-2]
+
+        waiting = sorted({xid for _, xids in self.pending for xid in xids})
+        running = set()
+        if waiting:
+            cursor.execute(
+                "SELECT array_agg(xid::text) FROM unnest(%s::xid8[]) xid WHERE pg_xact_status(xid) = 'in progress'",
+                [waiting]
+            )
+            running = set(cursor.fetchone()[0] or [])
+        for last_id, xids in self.pending:
+            if not running.intersection(xids):
+                self.settled = max(self.settled, last_id)
+        self.pending = [(last_id, xids) for last_id, xids in self.pending if last_id > self.settled]
+        self.checked_at = time.monotonic()
+
+
+_watermark = _Watermark()
+
+
+@lru_cache(maxsize=None)
+def _sequence_name() -> str:
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [InventoryAdjustmentLog._meta.db_table, 'id'])
+        return cursor.fetchone()[0]
+
+
+def settled_log_id() -> int:
+    """The highest log id below which every entry is visible, or rolled back"""
+    with _watermark.lock:
+        if time.monotonic() - _watermark.checked_at >= SETTLE_INTERVAL:
+            with connection.cursor() as cursor:
+                _watermark.refresh(cursor)
+        return _watermark.settled
+
+
+def log_changes(after_id: int, limit=MAX_BATCH_SIZE, warehouse_id=None, reasons: Iterable[str] = None,
+                timeout: float = 0) -> ChangeBatch:
+    """
+    The log entries after `after_id`, oldest first, of the warehouse and with the adjustment reasons if given.
+    Waits up to `timeout` seconds for an entry when there is none. The database connection is closed while
+    waiting, a waiting request holds none.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        settled = settled_log_id()
+        entries = []
+        if settled > after_id:
+            queryset = InventoryAdjustmentLog.objects.filter(id__gt=after_id, id__lte=settled)
+            if warehouse_id is not None:
+                queryset = queryset.filter(inventory__warehouse_id=warehouse_id)
+            if reasons:
+                queryset = queryset.filter(source_adjustment__reason__in=reasons)
+            entries = list(queryset.order_by('id').values(*ENTRY_FIELDS, **ENTRY_EXPRESSIONS)[:limit])
+            if len(entries) == limit:
+                return ChangeBatch(entries, entries[-1]['id'])
+            # nothing else up to the watermark matches the filters
+            after_id = settled
+
+        remaining = deadline - time.monotonic()
+        if entries or remaining <= 0:
+            return ChangeBatch(entries, after_id)
+        if not connection.in_atomic_block:
+            connection.close()
+        time.sleep(min(POLL_INTERVAL, remaining))
@@ -0,0 +1,136 @@
+"""
+Sharded inventory counters for hot products.
+
+Every stock movement locks its `Inventory` row, so writers of a popular product queue on a single row lock.
+When `Product.counter_shards` is set, `apply_adjustments` leaves the inventory rows of that product alone and adds
+its changes to one of `counter_shards` `InventoryCounterShard` rows picked at random, spreading the lock
+contention over that many rows. The counters of a sharded inventory are its own plus the sum of its shards.
+`fold_counter_shards` (`manage.py fold_counter_shards`) periodically merges the shards back into the inventories.
+The inventories' `updated_at` still moves with every change, for the API's delta polling and conditional GETs.
+
+The trade-off: the inventory row no longer serializes the writers of a sharded inventory, so the
+`absolute_pre_*` / `absolute_post_*` values of its log rows are read without a lock and are approximate under
+concurrency, and reads of its counters see committed shards only.
+"""
+import random
+from typing import Dict, Iterable, List
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from core.models import Inventory, InventoryCounterShard
+from utils.db import retry_on_serialization_failure
+
+COUNTERS = ('unordered', 'ordered', 'fulfilled')
+FOLD_BATCH_SIZE = 1000
+
+
+def shard_totals(inventory_ids: Iterable[int] = None, **inventory_filters) -> Dict[int, List[int]]:
+    """Sum of the not yet folded shards per inventory id, inventories without shards are left out"""
+    shards = InventoryCounterShard.objects.all()
+    if inventory_ids is not None:
+        shards = shards.filter(inventory_id__in=inventory_ids)
+    if inventory_filters:
+        shards = shards.filter(**{f'inventory__{key}': value for key, value in inventory_filters.items()})
+    totals = shards.values('inventory_id').annotate(**{counter: Sum(counter) for counter in COUNTERS}).order_by()
+    return {row['inventory_id']: [row[counter] for counter in COUNTERS] for row in totals}
+
+
+def add_shard_totals(inventories: Dict[int, Inventory]):
+    """Adds the shards to the counters of the inventories, in place"""
+    for inventory_id, totals in shard_totals(inventories).items():
+        inventory = inventories[inventory_id]
+        for counter, total in zip(COUNTERS, totals):
+            setattr(inventory, counter, getattr(inventory, counter) + total)
+
+
+def sharded_inventories(inventory_ids: Iterable[int]) -> Dict[int, Inventory]:
+    """
+    The inventories, among the given ones, whose product has sharding enabled. They are not locked, their counters
+    include their shards and `shard_count` is set to the product's number of shards.
+    """
+    inventories = {
+        inventory.id: inventory
+        for inventory in Inventory.objects.filter(
+            id__in=set(inventory_ids), product__counter_shards__gt=0
+        ).annotate(shard_count=F('product__counter_shards'))
+    }
+    add_shard_totals(inventories)
+    return inventories
+
+
+def increment_counter_shards(deltas: Dict[int, List[int]], shard_counts: Dict[int, int], batch_size):
+    """
+    Adds the per inventory deltas to a random shard of every inventory with an upsert. The shard rows are locked in
+    (inventory, shard) order, which is all the locking the writers of sharded inventories wait for.
+    `updated_at` of the inventories is set too, skipping the rows another writer holds: that writer sets it as well,
+    at a time before this change is committed.
+    """
+    now = timezone.now()
+    table = InventoryCounterShard._meta.db_table
+    inventories = Inventory._meta.db_table
+    rows = sorted(
+        (inventory_id, random.randrange(shard_counts[inventory_id]), *delta)
+        for inventory_id, delta in deltas.items()
+    )
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(batch))
+        params = [value for row in batch for value in (*row, now)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (inventory_id, shard, unordered, ordered, fulfilled, updated_at) '
+                f'VALUES {values} '
+                f'ON CONFLICT (inventory_id, shard) DO UPDATE SET '
+                f'unordered = {table}.unordered + EXCLUDED.unordered, '
+                f'ordered = {table}.ordered + EXCLUDED.ordered, '
+                f'fulfilled = {table}.fulfilled + EXCLUDED.fulfilled, '
+                f'updated_at = EXCLUDED.updated_at',
+                params
+            )
+
+    if deltas:
+        with connection.cursor() as cursor:
+            # NO KEY: the foreign keys of concurrent inserts referencing the inventory don't wait on it
+            cursor.execute(
+                f'UPDATE {inventories} SET updated_at = %s WHERE id IN ('
+                f'    SELECT id FROM {inventories} WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE SKIP LOCKED'
+                f')',
+                [now, sorted(deltas)]
+            )
+
+
+def fold_counter_shards(batch_size=FOLD_BATCH_SIZE) -> int:
+    """
+    Merges the shards into their inventories and deletes them, `batch_size` inventories per transaction.
+    Each batch is a single statement, so the counters never miss or double count a shard.
+    Returns the number of inventories folded.
+    """
+    inventory_ids = sorted(set(InventoryCounterShard.objects.values_list('inventory_id', flat=True)))
+    for start in range(0, len(inventory_ids), batch_size):
+        _fold_batch(inventory_ids[start:start + batch_size])
+    return len(inventory_ids)
+
+
+@retry_on_serialization_failure
+def _fold_batch(inventory_ids: List[int]):
+    shards = InventoryCounterShard._meta.db_table
+    inventories = Inventory._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH folded AS ('
+            f'    DELETE FROM {shards} WHERE inventory_id = ANY(%s) '
+            f'    RETURNING inventory_id, unordered, ordered, fulfilled'
+            f'), totals AS ('
+            f'    SELECT inventory_id, SUM(unordered) AS unordered, SUM(ordered) AS ordered, '
+            f'    SUM(fulfilled) AS fulfilled FROM folded GROUP BY inventory_id'
+            f') '
+            f'UPDATE {inventories} AS inventory '
+            f'SET unordered = inventory.unordered + totals.unordered, '
+            f'ordered = inventory.ordered + totals.ordered, '
+            f'fulfilled = inventory.fulfilled + totals.fulfilled, '
+            f'updated_at = %s '
+            f'FROM totals WHERE inventory.id = totals.inventory_id',
+            [inventory_ids, timezone.now()]
+        )
@@ -0,0 +1,45 @@
+"""
+Streaming exports of large tables as NDJSON.
+
+`export_ndjson` runs one query through a server side cursor and yields the rows `chunk_size` at a time, one JSON
+object per line built by Postgres (`row_to_json`, keyed by column name). Only a chunk is ever held in memory, whatever
+the size of the export, and the rows come in table order: there is no sort to wait for before the first line.
+The export reads one snapshot, its transaction lasting until the last row is sent.
+"""
+from datetime import datetime
+from typing import Dict, Iterator, Type
+
+from django.db import connection, models, transaction
+
+from core.models import InventoryAdjustmentLog, LineItem, Order
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORTS: Dict[str, Type[models.Model]] = {
+    'orders': Order,
+    'line-items': LineItem,
+    'inventory-adjustment-logs': InventoryAdjustmentLog,
+}
+
+
+def export_ndjson(kind, created_from: datetime = None, created_to: datetime = None,
+                  chunk_size=EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    NDJSON lines of all the columns of the `kind` rows (see `EXPORTS`) created in [created_from, created_to).
+    The query runs when the iteration starts.
+    """
+    model = EXPORTS[kind]
+    queryset = model.objects.all()
+    if created_from is not None:
+        queryset = queryset.filter(created_at__gte=created_from)
+    if created_to is not None:
+        queryset = queryset.filter(created_at__lt=created_to)
+    sql, params = queryset.values(*(field.attname for field in model._meta.concrete_fields)).query.sql_with_params()
+
+    with transaction.atomic(), connection.chunked_cursor() as cursor:
+        cursor.execute(f'SELECT row_to_json(r)::text FROM ({sql}) r', params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield ''.join(f'{row}\n' for row, in rows).encode()
@@ -0,0 +1,83 @@
+"""
+Idempotency keys.
+
+A client retrying a write (a scanner after a timeout, an integration after a network error) sends the same
+`Idempotency-Key` with every attempt. The first attempt claims the key and its response is stored, the retries get
+the stored response back without running the write again, so they take no inventory lock either.
+
+A key is claimed with a single `INSERT ... ON CONFLICT` on its primary key. Claimed inside the transaction of the
+write, a concurrent duplicate blocks on the uncommitted key until the first attempt ends, then either finds its
+response or, when it rolled back, claims the key itself. A key claimed in a transaction of its own and still in
+progress after `IDEMPOTENCY_KEY_LEASE` belongs to an attempt that died, a retry with the same payload takes it over
+(and runs the request again). Keys expire after `IDEMPOTENCY_KEY_TTL`, an expired key is claimed again like a new one
+and `purge_expired_idempotency_keys` deletes them.
+"""
+import hashlib
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.db import connection
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_KEY_LEASE = timedelta(minutes=30)
+PURGE_BATCH_SIZE = 10000
+
+
+def idempotency_key(client_key: str, scope: str, user_id) -> uuid.UUID:
+    """The stored key: a hash of the user, the scope (endpoint) and the client supplied key"""
+    return uuid.UUID(bytes=hashlib.sha256(f'{user_id}:{scope}:{client_key}'.encode()).digest()[:16])
+
+
+def claim_idempotency_key(key: uuid.UUID, request_hash: uuid.UUID, ttl=IDEMPOTENCY_KEY_TTL,
+                          lease=IDEMPOTENCY_KEY_LEASE) -> Optional[IdempotencyKey]:
+    """
+    Claims the key for a new request and returns None, or returns the live key of an earlier attempt.
+    Waits for a concurrent attempt that claimed the key in a transaction not committed yet, takes over the claim of
+    the same request still in progress after `lease`.
+    """
+    table = IdempotencyKey._meta.db_table
+    while True:
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} (key, request_hash, status_code, response, created_at, expires_at) '
+                f'VALUES (%s, %s, NULL, NULL, %s, %s) '
+                f'ON CONFLICT (key) DO UPDATE SET request_hash = EXCLUDED.request_hash, status_code = NULL, '
+                f'response = NULL, created_at = EXCLUDED.created_at, expires_at = EXCLUDED.expires_at '
+                f'WHERE {table}.expires_at <= EXCLUDED.created_at OR ({table}.status_code IS NULL '
+                f'AND {table}.request_hash = EXCLUDED.request_hash AND {table}.created_at <= %s) '
+                f'RETURNING key',
+                [key, request_hash, now, now + ttl, now - lease]
+            )
+            if cursor.fetchone():
+                return None
+        existing = IdempotencyKey.objects.filter(key=key).first()
+        # purged in between, claim it again
+        if existing is not None:
+            return existing
+
+
+def record_idempotent_response(key: uuid.UUID, status_code: int, response):
+    IdempotencyKey.objects.filter(key=key).update(status_code=status_code, response=response)
+
+
+def purge_expired_idempotency_keys(batch_size=PURGE_BATCH_SIZE) -> int:
+    """Deletes the expired keys, `batch_size` at a time, and returns how many were deleted"""
+    table = IdempotencyKey._meta.db_table
+    now = timezone.now()
+    purged = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE key IN ('
+                f'    SELECT key FROM {table} WHERE expires_at <= %s LIMIT %s FOR UPDATE SKIP LOCKED'
+                f')',
+                [now, batch_size]
+            )
+            purged += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return purged
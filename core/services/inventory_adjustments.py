@@ -0,0 +1,169 @@
+"""
+Batched inventory adjustments.
+
+Every stock movement is expressed as an `Adjustment`. `apply_adjustments` applies any number of them in a single
+transaction: the affected `Inventory` rows are locked once, the new counters and the `absolute_pre_*` /
+`absolute_post_*` values are computed in memory and all `InventoryAdjustment` and `InventoryAdjustmentLog` rows are
+bulk inserted. The cached available-to-promise totals are incremented once the transaction commits, and the live
+stock listeners are notified then.
+Inventories of products with `counter_shards` enabled aren't locked, their changes go to a counter shard instead.
+"""
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import Inventory, InventoryAdjustment, InventoryAdjustmentLog
+from core.services.atp import record_unordered_changes
+from core.services.counter_shards import add_shard_totals, increment_counter_shards, sharded_inventories
+from core.services.stock_events import notify_stock_changes
+from utils.db import retry_on_serialization_failure
+
+BATCH_SIZE = 2000
+LOCK_CHUNK_SIZE = 10000
+
+COUNTERS = ('unordered', 'ordered', 'fulfilled')
+
+
+class Adjustment(NamedTuple):
+    inventory_id: int
+    reason: str
+    unordered_change: int = 0
+    ordered_change: int = 0
+    fulfilled_change: int = 0
+    order_id: Optional[int] = None
+    receipt_id: Optional[uuid.UUID] = None
+    line_item_id: Optional[int] = None
+    comment: Optional[str] = None
+
+
+def lock_inventories(inventory_ids: Iterable[int]) -> Dict[int, Inventory]:
+    """
+    Takes row locks on the given inventories and returns them keyed by id.
+    Rows are always locked in ascending id order so concurrent callers can't deadlock on each other.
+    Must be called inside a transaction.
+    """
+    inventory_ids = sorted(set(inventory_ids))
+    inventories = {}
+    for start in range(0, len(inventory_ids), LOCK_CHUNK_SIZE):
+        chunk = inventory_ids[start:start + LOCK_CHUNK_SIZE]
+        queryset = Inventory.objects.select_for_update().filter(id__in=chunk).order_by('id')
+        inventories.update((inventory.id, inventory) for inventory in queryset)
+
+    missing = set(inventory_ids) - set(inventories)
+    if missing:
+        raise Inventory.DoesNotExist(f"Inventories do not exist: {sorted(missing)[:10]}")
+    return inventories
+
+
+def apply_adjustments(adjustments: Iterable[Adjustment], user=None,
+                      batch_size=BATCH_SIZE) -> List[InventoryAdjustment]:
+    """
+    Applies the adjustments in order and returns the created `InventoryAdjustment` rows.
+    Several adjustments may target the same inventory, each log row then records the counters as they were
+    right before and after that particular adjustment.
+
+    When called outside of a transaction the whole batch is retried if Postgres aborts it with a deadlock or a
+    serialization failure, inside an outer transaction the error is left to the caller.
+    """
+    # materialized before the retries, an iterator would be exhausted by the first attempt
+    adjustments = list(adjustments)
+    if not adjustments:
+        return []
+    return _apply_adjustments(adjustments, user, batch_size)
+
+
+@retry_on_serialization_failure
+def _apply_adjustments(adjustments: List[Adjustment], user, batch_size) -> List[InventoryAdjustment]:
+    with transaction.atomic():
+        inventory_ids = {adjustment.inventory_id for adjustment in adjustments}
+        sharded = sharded_inventories(inventory_ids)
+        inventories = lock_inventories(inventory_ids - set(sharded))
+        # shards left over from a product that had sharding enabled still count until they are folded
+        add_shard_totals(inventories)
+        inventories.update(sharded)
+
+        inventory_adjustments = InventoryAdjustment.objects.bulk_create([
+            InventoryAdjustment(
+                inventory_id=adjustment.inventory_id,
+                user=user,
+                order_id=adjustment.order_id,
+                receipt_id=adjustment.receipt_id,
+                line_item_id=adjustment.line_item_id,
+                unordered_change=adjustment.unordered_change,
+                ordered_change=adjustment.ordered_change,
+                fulfilled_change=adjustment.fulfilled_change,
+                reason=adjustment.reason,
+                comment=adjustment.comment,
+            )
+            for adjustment in adjustments
+        ], batch_size=batch_size)
+
+        logs = []
+        deltas = defaultdict(lambda: [0] * len(COUNTERS))
+        for inventory_adjustment in inventory_adjustments:
+            inventory = inventories[inventory_adjustment.inventory_id]
+            delta = deltas[inventory.id]
+            log = InventoryAdjustmentLog(inventory=inventory, source_adjustment=inventory_adjustment)
+            for index, counter in enumerate(COUNTERS):
+                change = getattr(inventory_adjustment, f'{counter}_change')
+                pre = getattr(inventory, counter)
+                setattr(log, f'{counter}_change', change)
+                setattr(log, f'absolute_pre_{counter}', pre)
+                setattr(log, f'absolute_post_{counter}', pre + change)
+                setattr(inventory, counter, pre + change)
+                delta[index] += change
+            logs.append(log)
+        InventoryAdjustmentLog.objects.bulk_create(logs, batch_size=batch_size)
+
+        _increment_inventory_counters(
+            {inventory_id: delta for inventory_id, delta in deltas.items() if inventory_id not in sharded}, batch_size
+        )
+        increment_counter_shards(
+            {inventory_id: delta for inventory_id, delta in deltas.items() if inventory_id in sharded},
+            {inventory_id: inventory.shard_count for inventory_id, inventory in sharded.items()},
+            batch_size
+        )
+
+        unordered_changes = defaultdict(int)
+        for inventory_id, delta in deltas.items():
+            inventory = inventories[inventory_id]
+            unordered_changes[(inventory.product_id, inventory.warehouse_id)] += delta[0]
+        record_unordered_changes(unordered_changes)
+        notify_stock_changes((inventories[inventory_id], delta) for inventory_id, delta in deltas.items())
+
+    return inventory_adjustments
+
+
+def _increment_inventory_counters(deltas: Dict[int, List[int]], batch_size):
+    """
+    Adds the per inventory deltas to the counters with one `UPDATE ... FROM (VALUES ...)` per batch.
+    The counters are incremented relative to the stored value (the bulk equivalent of `F('unordered') + change`)
+    rather than overwritten, so the stored totals stay consistent with the ledger even if a writer ever bypasses
+    `lock_inventories`. `bulk_update` builds a CASE expression per row and column which is far too slow here.
+    """
+    now = timezone.now()
+    table = Inventory._meta.db_table
+    rows = sorted(deltas.items())
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        values = ', '.join(['(%s, %s, %s, %s)'] * len(batch))
+        params = [value for inventory_id, delta in batch for value in (inventory_id, *delta)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} AS inventory '
+                f'SET unordered = inventory.unordered + v.unordered, '
+                f'ordered = inventory.ordered + v.ordered, '
+                f'fulfilled = inventory.fulfilled + v.fulfilled, '
+                f'updated_at = %s '
+                f'FROM (VALUES {values}) AS v (id, unordered, ordered, fulfilled) '
+                f'WHERE inventory.id = v.id',
+                [now, *params]
+            )
+
+
+def apply_adjustment(inventory_id, reason, user=None, **changes) -> InventoryAdjustment:
+    """Shortcut to apply a single adjustment"""
+    return apply_adjustments([Adjustment(inventory_id, reason, **changes)], user=user)[0]
@@ -0,0 +1,126 @@
+"""
+Point-in-time stock.
+
+`build_snapshots` folds the `InventoryAdjustmentLog` rows written since the previous run into new
+`InventorySnapshot` rows. `stock_as_of` then answers "what was in stock at time X" from the nearest snapshot before X
+plus the log rows between that snapshot and X, instead of replaying the whole ledger. Once a month of log rows is
+archived the stock can't be computed for the times that need them anymore.
+"""
+from datetime import timedelta
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+from core.models import Inventory, InventoryAdjustmentLog, InventoryAdjustmentLogArchive, InventorySnapshot
+from core.services.log_archive import ArchiveError, month_bounds
+
+COUNTERS = ('unordered', 'ordered', 'fulfilled')
+
+# Log rows younger than this are left for the next run so that transactions which were still in flight when the
+# high-water mark was taken (and may commit rows with lower ids) are not skipped.
+SETTLE_SECONDS = 5 * 60
+
+CHUNK_SIZE = 5000
+
+
+def latest_snapshots(inventory_ids, at=None) -> Dict[int, InventorySnapshot]:
+    """Returns the most recent snapshot (taken at or before `at` if given) of each inventory"""
+    inventory_ids = list(inventory_ids)
+    snapshots = {}
+    for start in range(0, len(inventory_ids), CHUNK_SIZE):
+        queryset = InventorySnapshot.objects.filter(inventory_id__in=inventory_ids[start:start + CHUNK_SIZE])
+        if at is not None:
+            queryset = queryset.filter(taken_at__lte=at)
+        queryset = queryset.order_by('inventory_id', '-taken_at').distinct('inventory_id')
+        snapshots.update((snapshot.inventory_id, snapshot) for snapshot in queryset)
+    return snapshots
+
+
+def build_snapshots(settle_seconds=SETTLE_SECONDS) -> int:
+    """
+    Writes a snapshot for every inventory that has log rows after the current high-water mark.
+    Returns the number of snapshots created.
+    """
+    previous_high_water = InventorySnapshot.objects.aggregate(high_water=Max('log_high_water'))['high_water'] or 0
+    high_water = InventoryAdjustmentLog.objects.filter(
+        id__gt=previous_high_water,
+        created_at__lte=timezone.now() - timedelta(seconds=settle_seconds),
+    ).aggregate(high_water=Max('id'))['high_water']
+    if high_water is None:
+        return 0
+
+    changes = InventoryAdjustmentLog.objects.filter(
+        id__gt=previous_high_water, id__lte=high_water, inventory__isnull=False,
+    ).values('inventory_id').annotate(
+        last_change_at=Max('created_at'),
+        **{counter: Sum(f'{counter}_change') for counter in COUNTERS}
+    ).order_by()
+    changes = {row['inventory_id']: row for row in changes}
+    if not changes:
+        return 0
+
+    # the snapshot is valid from the moment of the newest change it contains
+    taken_at = max(change['last_change_at'] for change in changes.values())
+
+    previous = latest_snapshots(changes)
+    snapshots = []
+    for inventory_id, change in changes.items():
+        snapshot = InventorySnapshot(inventory_id=inventory_id, log_high_water=high_water, taken_at=taken_at)
+        for counter in COUNTERS:
+            base = getattr(previous[inventory_id], counter) if inventory_id in previous else 0
+            setattr(snapshot, counter, base + change[counter])
+        snapshots.append(snapshot)
+
+    with transaction.atomic():
+        InventorySnapshot.objects.bulk_create(snapshots, batch_size=CHUNK_SIZE)
+    return len(snapshots)
+
+
+def stock_as_of(at, **inventory_filters) -> Dict[int, Dict[str, int]]:
+    """
+    Returns the counters of every inventory matching `inventory_filters` (e.g. `warehouse=warehouse`) as they were
+    at `at`, keyed by inventory id.
+
+    A run only snapshots the inventories that changed since the previous run, so an inventory whose latest
+    snapshot is older than the latest run (or which has no snapshot at all) had no log rows in between.
+    That makes the latest high-water mark before `at` a valid lower bound for every inventory and the remaining
+    log rows can be read with a single range scan.
+    :raise ArchiveError: when some of those log rows are archived
+    """
+    high_water = InventorySnapshot.objects.filter(
+        taken_at__lte=at
+    ).aggregate(high_water=Max('log_high_water'))['high_water'] or 0
+    # archived rows are gone from the table, the stock would silently miss them
+    archive = InventoryAdjustmentLogArchive.objects.filter(last_log_id__gt=high_water).order_by('month').first()
+    if archive is not None and month_bounds(archive.month)[0] <= at:
+        raise ArchiveError(
+            f'The adjustment logs of {archive.month:%Y-%m} are archived, the stock as of {at} is not available'
+        )
+    # by the same reasoning nothing after the first run following `at` can be older than `at`
+    next_high_water = InventorySnapshot.objects.filter(
+        taken_at__gt=at
+    ).aggregate(high_water=Min('log_high_water'))['high_water']
+
+    inventory_ids = list(Inventory.objects.filter(**inventory_filters).values_list('id', flat=True))
+    snapshots = latest_snapshots(inventory_ids, at=at) if high_water else {}
+
+    stock = {}
+    for inventory_id in inventory_ids:
+        snapshot = snapshots.get(inventory_id)
+        stock[inventory_id] = {counter: getattr(snapshot, counter) if snapshot else 0 for counter in COUNTERS}
+
+    for start in range(0, len(inventory_ids), CHUNK_SIZE):
+        deltas = InventoryAdjustmentLog.objects.filter(
+            inventory_id__in=inventory_ids[start:start + CHUNK_SIZE], id__gt=high_water, created_at__lte=at,
+        )
+        if next_high_water is not None:
+            deltas = deltas.filter(id__lte=next_high_water)
+        deltas = deltas.values('inventory_id').annotate(
+            **{counter: Sum(f'{counter}_change') for counter in COUNTERS}
+        ).order_by()
+        for delta in deltas:
+            for counter in COUNTERS:
+                stock[delta['inventory_id']][counter] += delta[counter]
+    return stock
@@ -0,0 +1,190 @@
+"""
+Archival of closed months of the inventory adjustment ledger.
+
+`archive_month` streams a month of `InventoryAdjustmentLog` rows into a gzip-CSV file with a JSON manifest next to
+it, records the manifest and a per inventory `InventoryAdjustmentLogSummary` in the database and only then deletes
+the rows, in bounded batches (or by dropping the month's partition when the table is partitioned).
+`iter_archived_logs` reads an archived month back for audits after verifying its checksum.
+"""
+import csv
+import gzip
+import hashlib
+import json
+import os
+from collections import defaultdict
+from datetime import date
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import InventoryAdjustmentLog, InventoryAdjustmentLogArchive, InventoryAdjustmentLogSummary, \
+    InventorySnapshot
+from core.services.partitions import add_months, current_month, is_partitioned, month_start, partition_name
+
+COLUMNS = (
+    'id', 'inventory_id', 'source_adjustment_id',
+    'unordered_change', 'ordered_change', 'fulfilled_change',
+    'absolute_pre_unordered', 'absolute_pre_ordered', 'absolute_pre_fulfilled',
+    'absolute_post_unordered', 'absolute_post_ordered', 'absolute_post_fulfilled',
+    'created_at',
+)
+COUNTERS = ('unordered', 'ordered', 'fulfilled')
+
+CHUNK_SIZE = 5000
+DELETE_BATCH_SIZE = 10000
+
+
+class ArchiveError(Exception):
+    """
+    raised when a month can't be archived or when an archive file doesn't match its manifest
+    """
+    pass
+
+
+def month_bounds(month: date):
+    """Months are cut in the default time zone, the same boundaries the partitions use"""
+    return month_start(month), month_start(add_months(month, 1))
+
+
+def file_sha256(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def archivable_months(keep_months: int) -> List[date]:
+    """Months with log rows that ended more than `keep_months` months ago"""
+    oldest = InventoryAdjustmentLog.objects.order_by('id').values_list('created_at', flat=True).first()
+    if oldest is None:
+        return []
+    oldest_month = timezone.localdate(oldest, timezone.get_default_timezone()).replace(day=1)
+    month, until = oldest_month, add_months(current_month(), -keep_months)
+    months = []
+    while month < until:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def archive_month(month: date, directory=None, batch_size=DELETE_BATCH_SIZE) -> Optional[InventoryAdjustmentLogArchive]:
+    """
+    Archives and deletes the log rows of a closed month. Returns the archive, or None if the month had no rows.
+    Calling it again for an archived month finishes an interrupted deletion.
+    """
+    directory = directory or settings.ADJUSTMENT_LOG_ARCHIVE_DIR
+    month = month.replace(day=1)
+    since, until = month_bounds(month)
+    if until > timezone.now():
+        raise ArchiveError(f'{month:%Y-%m} is not closed yet')
+
+    logs = InventoryAdjustmentLog.objects.filter(created_at__gte=since, created_at__lt=until)
+
+    archive = InventoryAdjustmentLogArchive.objects.filter(month=month).first()
+    if archive:
+        _delete_logs(month, logs.filter(id__lte=archive.last_log_id), batch_size)
+        return archive
+
+    stats = logs.aggregate(row_count=Count('id'), first_log_id=Min('id'), last_log_id=Max('id'))
+    if not stats['row_count']:
+        return None
+
+    # stock_as_of relies on snapshots for everything before the latest high-water mark
+    high_water = InventorySnapshot.objects.aggregate(high_water=Max('log_high_water'))['high_water'] or 0
+    if stats['last_log_id'] > high_water:
+        raise ArchiveError(f'{month:%Y-%m} is not covered by inventory snapshots yet, run build_inventory_snapshots')
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'inventory_adjustment_logs_{month:%Y_%m}.csv.gz')
+    row_count, totals = _write_archive_file(path, logs)
+    if row_count != stats['row_count']:
+        os.remove(path)
+        raise ArchiveError(f'{month:%Y-%m} changed while it was being archived')
+    sha256 = file_sha256(path)
+
+    manifest = {
+        'month': f'{month:%Y-%m}',
+        'file': os.path.basename(path),
+        'format': 'csv+gzip',
+        'columns': COLUMNS,
+        'sha256': sha256,
+        **stats,
+    }
+    with open(f'{path}.manifest.json', 'w') as file:
+        json.dump(manifest, file, indent=2)
+
+    with transaction.atomic():
+        archive = InventoryAdjustmentLogArchive.objects.create(month=month, path=path, sha256=sha256, **stats)
+        InventoryAdjustmentLogSummary.objects.bulk_create([
+            InventoryAdjustmentLogSummary(
+                archive=archive,
+                inventory_id=inventory_id,
+                row_count=total['row_count'],
+                **{f'{counter}_change': total[counter] for counter in COUNTERS}
+            )
+            for inventory_id, total in totals.items()
+        ], batch_size=CHUNK_SIZE)
+
+    _delete_logs(month, logs, batch_size)
+    return archive
+
+
+def _write_archive_file(path, logs):
+    """Streams the rows into the file through a server side cursor and totals them per inventory on the way"""
+    totals = defaultdict(lambda: {'row_count': 0, **{counter: 0 for counter in COUNTERS}})
+    changes = [COLUMNS.index(f'{counter}_change') for counter in COUNTERS]
+    row_count = 0
+
+    temporary_path = f'{path}.tmp'
+    with gzip.open(temporary_path, 'wt', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for row in logs.order_by('id').values_list(*COLUMNS).iterator(chunk_size=CHUNK_SIZE):
+            writer.writerow(row)
+            total = totals[row[1]]
+            total['row_count'] += 1
+            for counter, index in zip(COUNTERS, changes):
+                total[counter] += row[index]
+            row_count += 1
+    os.replace(temporary_path, path)
+    return row_count, totals
+
+
+def _delete_logs(month, logs, batch_size):
+    """Deletes in bounded batches so neither locks nor WAL pile up, a partition is simply dropped"""
+    if is_partitioned(InventoryAdjustmentLog):
+        partition = partition_name(InventoryAdjustmentLog._meta.db_table, month)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {partition}')
+
+    while True:
+        with transaction.atomic():
+            ids = list(logs.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return
+            InventoryAdjustmentLog.objects.filter(id__in=ids).delete()
+
+
+def iter_archived_logs(month: date) -> Iterator[dict]:
+    """
+    Lazily yields the archived log rows of a month as dicts, once the file is verified against its manifest.
+    :raise ArchiveError
+    """
+    try:
+        archive = InventoryAdjustmentLogArchive.objects.get(month=month.replace(day=1))
+    except InventoryAdjustmentLogArchive.DoesNotExist:
+        raise ArchiveError(f'{month:%Y-%m} is not archived')
+    if file_sha256(archive.path) != archive.sha256:
+        raise ArchiveError(f'Checksum mismatch for {archive.path}')
+
+    with gzip.open(archive.path, 'rt', newline='') as file:
+        for row in csv.DictReader(file):
+            yield {
+                column: parse_datetime(value) if column == 'created_at' else (int(value) if value else None)
+                for column, value in row.items()
+            }
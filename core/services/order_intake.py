@@ -0,0 +1,138 @@
+"""
+Batched order intake.
+
+`intake_orders` creates a batch of orders with their customers and line items in one transaction and a fixed number
+of queries, whatever the batch size: products and already used tracking ids are checked with one query each,
+customers are matched by email, then phone, with a single lookup, the missing ones and then the orders and the line
+items are bulk inserted. An order that can't be created (unknown product, tracking id already used) is reported in
+its result and left out, the rest of the batch goes through.
+"""
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from core.models import Customer, LineItem, Order, Product
+
+INTAKE_ATTEMPTS = 3
+
+
+class NewOrder(NamedTuple):
+    tracking_id: str
+    # Customer field values, `email` and/or `phone` identify an existing customer
+    customer: Dict[str, object]
+    # (product id, price, quantity)
+    line_items: List[Tuple[int, Decimal, int]]
+    print_priority: int = 5
+
+
+class OrderResult(NamedTuple):
+    tracking_id: str
+    order_id: Optional[int] = None
+    customer_id: Optional[int] = None
+    errors: Tuple[str, ...] = ()
+
+    @property
+    def created(self) -> bool:
+        return self.order_id is not None
+
+
+def intake_orders(orders: List[NewOrder], user=None) -> List[OrderResult]:
+    """
+    Creates the orders and returns one result per order, in the same order.
+    A tracking id taken by a concurrent request while the batch is inserted makes the batch start over, that order
+    then fails and the others are created.
+    """
+    for attempt in range(INTAKE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _intake(orders, user)
+        except IntegrityError:
+            if attempt == INTAKE_ATTEMPTS - 1:
+                raise
+    return []
+
+
+def _intake(orders: List[NewOrder], user) -> List[OrderResult]:
+    errors = {index: [] for index in range(len(orders))}
+
+    product_ids = {product_id for order in orders for product_id, _, _ in order.line_items}
+    known_products = set(Product.objects.filter(id__in=product_ids, disabled_at=None).values_list('id', flat=True))
+    used_tracking_ids = set(Order.objects.filter(
+        tracking_id__in={order.tracking_id for order in orders}
+    ).values_list('tracking_id', flat=True))
+
+    seen_tracking_ids = set()
+    for index, order in enumerate(orders):
+        unknown = sorted({product_id for product_id, _, _ in order.line_items} - known_products)
+        if unknown:
+            errors[index].append(f'Unknown or disabled products: {unknown}')
+        if order.tracking_id in used_tracking_ids:
+            errors[index].append(f'Tracking id {order.tracking_id} is already used')
+        elif order.tracking_id in seen_tracking_ids:
+            errors[index].append(f'Tracking id {order.tracking_id} is repeated in the batch')
+        seen_tracking_ids.add(order.tracking_id)
+
+    valid = [index for index in range(len(orders)) if not errors[index]]
+    customer_ids = _match_customers([orders[index].customer for index in valid])
+
+    created = Order.objects.bulk_create([
+        Order(
+            tracking_id=orders[index].tracking_id,
+            customer_id=customer_id,
+            print_priority=orders[index].print_priority,
+            created_by=user,
+        )
+        for index, customer_id in zip(valid, customer_ids)
+    ])
+    LineItem.objects.bulk_create([
+        LineItem(order=order, product_id=product_id, price=price, quantity=quantity)
+        for index, order in zip(valid, created)
+        for product_id, price, quantity in orders[index].line_items
+    ])
+
+    order_ids = {index: (order.id, order.customer_id) for index, order in zip(valid, created)}
+    return [
+        OrderResult(order.tracking_id, *order_ids.get(index, (None, None)), errors=tuple(errors[index]))
+        for index, order in enumerate(orders)
+    ]
+
+
+def _match_customers(customers: List[Dict[str, object]]) -> List[int]:
+    """
+    The ids of the customers, matched by email and then phone with one query, the others are created (once per
+    email / phone in the batch). Existing customers are not updated.
+    """
+    emails = {customer['email'] for customer in customers if customer.get('email')}
+    phones = {customer['phone'] for customer in customers if customer.get('phone')}
+    by_email, by_phone = {}, {}
+    if emails or phones:
+        for customer_id, email, phone in Customer.objects.filter(
+            Q(email__in=emails) | Q(phone__in=phones)
+        ).order_by('id').values_list('id', 'email', 'phone'):
+            if email:
+                by_email.setdefault(email, customer_id)
+            if phone:
+                by_phone.setdefault(phone, customer_id)
+
+    def match(customer):
+        return by_email.get(customer.get('email') or '') or by_phone.get(customer.get('phone') or '')
+
+    new_customers = []
+    for customer in customers:
+        if match(customer) is None:
+            new_customer = Customer(**customer)
+            new_customers.append(new_customer)
+            # later orders of the same new customer match it
+            if new_customer.email:
+                by_email[new_customer.email] = new_customer
+            if new_customer.phone:
+                by_phone[new_customer.phone] = new_customer
+    Customer.objects.bulk_create(new_customers)
+
+    ids = []
+    for customer in customers:
+        matched = match(customer)
+        ids.append(matched.id if isinstance(matched, Customer) else matched)
+    return ids
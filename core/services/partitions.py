@@ -0,0 +1,167 @@
+"""
+Opt-in monthly range partitioning of the append-only adjustment tables.
+
+`convert_to_partitioned` rebuilds `core_inventoryadjustment` / `core_inventoryadjustmentlog` as tables partitioned
+by `created_at` month and moves the existing rows over, `ensure_partitions` keeps partitions for the coming months
+in place. Both are exposed through `manage.py partition_adjustment_tables`.
+
+Postgres requires the primary key of a partitioned table to include the partition key, so the primary key becomes
+(id, created_at) and foreign keys *referencing* a partitioned table (InventoryAdjustmentLog.source_adjustment) are
+dropped. `on_delete=PROTECT` is enforced by Django itself so the ORM keeps protecting those rows.
+
+Months are cut in the default time zone (`TIME_ZONE`), the one the admin's month filter uses, so filtering a month
+scans a single partition. Changing `TIME_ZONE` once the tables are partitioned needs them converted again.
+"""
+from datetime import date, datetime, time
+from typing import List
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.models import InventoryAdjustment, InventoryAdjustmentLog
+
+PARTITIONED_MODELS = (InventoryAdjustment, InventoryAdjustmentLog)
+PARTITION_KEY = 'created_at'
+MONTHS_AHEAD = 3
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month: date) -> str:
+    return f'{table}_p{month:%Y_%m}'
+
+
+def month_start(month: date) -> datetime:
+    """The first instant of the month in the default time zone"""
+    return timezone.make_aware(datetime.combine(month, time.min), timezone.get_default_timezone())
+
+
+def current_month() -> date:
+    return timezone.localdate(timezone=timezone.get_default_timezone()).replace(day=1)
+
+
+def is_partitioned(model) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [model._meta.db_table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def _table_exists(cursor, name) -> bool:
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [name])
+    return cursor.fetchone()[0]
+
+
+def create_partitions(model, since: date, until: date) -> List[str]:
+    """
+    Creates the missing monthly partitions covering [since, until) and returns the names of all of them.
+    Rows of a new partition's month already in the default partition are moved into it: the default partition is
+    detached while the partition is created (Postgres refuses to create it otherwise) and attached back after.
+    """
+    table = model._meta.db_table
+    default = f'{table}_default'
+    month = since.replace(day=1)
+    names = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        has_default = _table_exists(cursor, default)
+        while month < until:
+            name = partition_name(table, month)
+            names.append(name)
+            bounds = [month_start(month), month_start(add_months(month, 1))]
+            month = add_months(month, 1)
+            if _table_exists(cursor, name):
+                continue
+
+            create = f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)'
+            moved = False
+            if has_default:
+                cursor.execute(
+                    f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s)',
+                    bounds
+                )
+                moved = cursor.fetchone()[0]
+            if not moved:
+                cursor.execute(create, bounds)
+                continue
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+            cursor.execute(create, bounds)
+            cursor.execute(
+                f'WITH moved AS ('
+                f'    DELETE FROM {default} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s RETURNING *'
+                f') INSERT INTO {table} SELECT * FROM moved',
+                bounds
+            )
+            cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+    return names
+
+
+def ensure_partitions(months_ahead=MONTHS_AHEAD) -> List[str]:
+    """
+    Makes sure every partitioned adjustment table has partitions from the current month up to `months_ahead`
+    months ahead. Meant to be run periodically, rows outside of all partitions end up in the default partition.
+    """
+    this_month = current_month()
+    names = []
+    for model in PARTITIONED_MODELS:
+        if is_partitioned(model):
+            names += create_partitions(model, this_month, add_months(this_month, months_ahead + 1))
+    return names
+
+
+def convert_to_partitioned(model, months_ahead=MONTHS_AHEAD):
+    """
+    Rebuilds the model's table as a partitioned table and copies the existing rows into it.
+    The table is locked for the duration of the copy, run it during a maintenance window.
+    """
+    table = model._meta.db_table
+    legacy = f'{table}_unpartitioned'
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+
+        cursor.execute("""
+            SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN (
+                SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype IN ('p', 'u')
+            )
+        """, [table, table])
+        indexes = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute("""
+            SELECT constraint_.conname, pg_get_constraintdef(constraint_.oid)
+            FROM pg_constraint constraint_ JOIN pg_class referenced ON referenced.oid = constraint_.confrelid
+            WHERE constraint_.conrelid = %s::regclass AND constraint_.contype = 'f' AND referenced.relkind != 'p'
+        """, [table])
+        foreign_keys = cursor.fetchall()
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+
+        cursor.execute(f"SELECT MIN(created_at) FROM {table}")
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+        cursor.execute(f'ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey')
+        cursor.execute(
+            f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ({PARTITION_KEY})'
+        )
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {PARTITION_KEY})')
+        cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+
+        this_month = current_month()
+        since = min(timezone.localdate(oldest, timezone.get_default_timezone()), this_month) if oldest else this_month
+        create_partitions(model, since, add_months(this_month, months_ahead + 1))
+        cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {table} SELECT * FROM {legacy}')
+        # CASCADE drops the foreign keys of other tables pointing at the old table
+        cursor.execute(f'DROP TABLE {legacy} CASCADE')
+
+        for index in indexes:
+            cursor.execute(index)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+        cursor.execute(f'ANALYZE {table}')
@@ -0,0 +1,216 @@
+"""
+Pick path planning.
+
+A warehouse is modelled as parallel aisles (`Location.aisle`) with cross aisles at the front and the back, the
+position along an aisle being the `Location.column`. Aisles and columns are ranked in natural order ('2' before
+'10'), the level only breaks ties since it doesn't add walking. The walk starts and ends at the front of the first
+aisle.
+
+`plan_pick_path` builds an S-shape route (every aisle with picks is traversed entirely, alternating directions)
+and a largest gap route, and refines the shorter one with a bounded 2-opt. Walking distances are computed in O(1)
+from the grid coordinates, so instead of a distance matrix the location → coordinates layout is cached per
+warehouse, until its locations change.
+"""
+import re
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db.models import Count, Max
+
+from core.models import InventoryAdjustment, Location
+
+# walking distance between two adjacent aisles, in columns
+AISLE_PITCH = 3
+
+# 2-opt only tries to reverse segments of up to this many stops, and gives up after the time budget
+TWO_OPT_WINDOW = 60
+TWO_OPT_TIME_BUDGET = 2.0
+
+DEPOT = (0, -1)
+
+
+class WarehouseLayout(NamedTuple):
+    version: tuple
+    aisle_length: int
+    # location id: (x, y, level rank)
+    coordinates: Dict[object, Tuple[int, int, int]]
+
+
+class PickPath(NamedTuple):
+    location_ids: List[object]
+    distance: int
+
+
+_layouts: Dict[int, WarehouseLayout] = {}
+
+
+def natural_key(value: Optional[str]):
+    """'A2' < 'A10', None last"""
+    if value is None:
+        return (1,)
+    return (0, *(
+        (0, int(part), '') if part.isdigit() else (1, 0, part.lower())
+        for part in re.split(r'(\d+)', value) if part
+    ))
+
+
+def warehouse_layout(warehouse_id) -> WarehouseLayout:
+    """The grid coordinates of every location of the warehouse, rebuilt only when its locations change"""
+    locations = Location.objects.filter(warehouse_id=warehouse_id)
+    version = tuple(locations.aggregate(count=Count('uuid'), updated_at=Max('updated_at')).values())
+    layout = _layouts.get(warehouse_id)
+    if layout is not None and layout.version == version:
+        return layout
+
+    rows = list(locations.values_list('uuid', 'aisle', 'column', 'level'))
+    aisles = _ranks(aisle for _, aisle, _, _ in rows)
+    columns = _ranks(column for _, _, column, _ in rows)
+    levels = _ranks(level for _, _, _, level in rows)
+    layout = WarehouseLayout(
+        version=version,
+        aisle_length=len(columns),
+        coordinates={
+            uuid: (aisles[aisle] * AISLE_PITCH, columns[column], levels[level])
+            if aisle is not None and column is not None else (*DEPOT, levels[level])
+            for uuid, aisle, column, level in rows
+        },
+    )
+    _layouts[warehouse_id] = layout
+    return layout
+
+
+def _ranks(values: Iterable[Optional[str]]) -> Dict[Optional[str], int]:
+    return {value: rank for rank, value in enumerate(sorted(set(values), key=natural_key))}
+
+
+def plan_pick_path(location_ids: Iterable, warehouse_id) -> PickPath:
+    """
+    Returns the locations in walking order, with the length of the walk. Locations without an aisle or a column
+    are picked at the start. :raise Location.DoesNotExist for locations outside of the warehouse
+    """
+    layout = warehouse_layout(warehouse_id)
+    location_ids = list(dict.fromkeys(location_ids))
+    missing = [location_id for location_id in location_ids if location_id not in layout.coordinates]
+    if missing:
+        raise Location.DoesNotExist(f'Locations not in warehouse {warehouse_id}: {missing[:10]}')
+
+    points = [layout.coordinates[location_id] for location_id in location_ids]
+    order, distance = route(points, layout.aisle_length)
+    return PickPath([location_ids[index] for index in order], distance)
+
+
+def order_pick_locations(order_ids: Iterable[int]) -> Dict[int, List[object]]:
+    """
+    The locations holding the stock reserved for the orders, per warehouse.
+    Reserved inventories without a location are left out.
+    """
+    reservations = InventoryAdjustment.objects.filter(
+        order_id__in=order_ids, reason=InventoryAdjustment.REASON_CHOICES.order_reserved,
+        inventory__location__isnull=False,
+    ).values_list('inventory__warehouse_id', 'inventory__location_id').distinct()
+    locations = {}
+    for warehouse_id, location_id in reservations:
+        locations.setdefault(warehouse_id, []).append(location_id)
+    return locations
+
+
+def plan_order_pick_paths(order_ids: Iterable[int]) -> Dict[int, PickPath]:
+    """One pick path per warehouse for the reserved stock of the orders"""
+    return {
+        warehouse_id: plan_pick_path(location_ids, warehouse_id)
+        for warehouse_id, location_ids in order_pick_locations(order_ids).items()
+    }
+
+
+def distance(a, b, aisle_length) -> int:
+    """Walking distance between two points of the grid, changing aisles through the front or the back cross aisle"""
+    if a[0] == b[0]:
+        return abs(a[1] - b[1])
+    return abs(a[0] - b[0]) + min(a[1] + b[1] + 2, 2 * aisle_length - a[1] - b[1])
+
+
+def s_shape(points: List[Tuple], aisle_length) -> List[int]:
+    """Indexes of the points in S-shape order"""
+    aisles = {}
+    for index, point in enumerate(points):
+        aisles.setdefault(point[0], []).append(index)
+    order = []
+    for rank, aisle in enumerate(sorted(aisles)):
+        order += sorted(aisles[aisle], key=lambda index: points[index][1:], reverse=rank % 2 == 1)
+    return order
+
+
+def largest_gap(points: List[Tuple], aisle_length) -> List[int]:
+    """
+    Indexes of the points in largest gap order: the first and the last aisle with picks are traversed entirely,
+    the other aisles are entered from the back and from the front up to the largest gap between their picks
+    """
+    aisles = {}
+    for index, point in enumerate(points):
+        aisles.setdefault(point[0], []).append(index)
+    aisles = [sorted(aisles[aisle], key=lambda index: points[index][1:]) for aisle in sorted(aisles)]
+    if len(aisles) == 1:
+        return aisles[0]
+
+    from_back, from_front = [], []
+    for indexes in aisles[1:-1]:
+        stops = [-1] + [points[index][1] for index in indexes] + [aisle_length]
+        gap = max(range(len(stops) - 1), key=lambda position: stops[position + 1] - stops[position])
+        from_front.append(indexes[:gap])
+        from_back.append(indexes[gap:][::-1])
+    order = list(aisles[0])
+    for indexes in from_back:
+        order += indexes
+    order += aisles[-1][::-1]
+    for indexes in reversed(from_front):
+        order += indexes
+    return order
+
+
+def route(points: List[Tuple], aisle_length, window=TWO_OPT_WINDOW, time_budget=TWO_OPT_TIME_BUDGET):
+    """
+    Indexes of the points in walking order and the length of the walk, from and back to the depot.
+    The shorter of the S-shape and the largest gap routes is refined with 2-opt.
+    """
+    if not points:
+        return [], 0
+    order = min(
+        (s_shape(points, aisle_length), largest_gap(points, aisle_length)),
+        key=lambda candidate: _length(_tour(points, candidate), aisle_length)
+    )
+    tour = _tour(points, order)
+    order = [None] + order + [None]
+    _two_opt(tour, order, aisle_length, window, time_budget)
+    return order[1:-1], _length(tour, aisle_length)
+
+
+def _tour(points, order):
+    return [DEPOT, *(points[index][:2] for index in order), DEPOT]
+
+
+def _length(tour, aisle_length) -> int:
+    return sum(distance(tour[i], tour[i + 1], aisle_length) for i in range(len(tour) - 1))
+
+
+def _two_opt(tour, order, aisle_length, window, time_budget):
+    """Reverses tour segments of up to `window` stops while it shortens the walk, in place"""
+    deadline = time.monotonic() + time_budget
+    last = len(tour) - 2
+    improved = True
+    while improved and time.monotonic() < deadline:
+        improved = False
+        for i in range(1, last):
+            a, b = tour[i - 1], tour[i]
+            ab = distance(a, b, aisle_length)
+            for j in range(i + 1, min(last, i + window) + 1):
+                c, d = tour[j], tour[j + 1]
+                change = distance(a, c, aisle_length) + distance(b, d, aisle_length) - ab \
+                    - distance(c, d, aisle_length)
+                if change < 0:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = True
+                    b = tour[i]
+                    ab = distance(a, b, aisle_length)
+            if not i % 256 and time.monotonic() >= deadline:
+                return
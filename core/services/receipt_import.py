@@ -0,0 +1,267 @@
+"""
+Streaming import of receipts.
+
+`import_receipt` reads the lines of a receipt from a CSV or JSONL file, one chunk of rows at a time so memory stays
+flat whatever the size of the file, and creates the `Receipt`, its `LineItem`s and their `inventory_received`
+adjustments. Every chunk of lines is received in its own transaction. SKUs, lot numbers and inventories are resolved
+through lookups cached for the whole import, unknown lot codes and inventories are created in bulk.
+
+Expected columns / keys: `sku`, `quantity`, `price`, and optionally `variant` (required when several products share
+the SKU) and `lot_number`. Invalid rows are skipped and reported with their line number.
+"""
+import csv
+import gzip
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+
+from core.models import Inventory, InventoryAdjustment, LineItem, LotCode, Product, Receipt
+from core.services.inventory_adjustments import Adjustment, apply_adjustments
+from utils.db import retry_on_serialization_failure
+
+CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+MAX_QUANTITY = 32767
+PRICE_STEP = Decimal('0.01')
+MAX_PRICE = Decimal('99999999.99')
+MAX_LOT_NUMBER_LENGTH = LotCode._meta.get_field('lot_number').max_length
+
+
+class RowError(NamedTuple):
+    line: int
+    error: str
+    row: dict
+
+
+class ImportResult(NamedTuple):
+    receipt: Receipt
+    rows: int
+    imported: int
+    error_count: int
+    errors: List[RowError]
+
+
+class _Line(NamedTuple):
+    line: int
+    product_id: int
+    lot_number: Optional[str]
+    quantity: int
+    price: Decimal
+
+
+def iter_rows(file, file_format=None) -> Iterator[Tuple[int, dict]]:
+    """
+    Lazily yields (line number, row) from a binary file object, gzip compressed files are decompressed on the fly.
+    The format is guessed from the file name when not given.
+    """
+    name = getattr(file, 'name', '') or ''
+    if name.endswith('.gz'):
+        file = gzip.GzipFile(fileobj=file)
+        name = name[:-3]
+    file_format = file_format or ('jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv')
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+
+    if file_format == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else {'__invalid__': line.strip()}
+    else:
+        raise ValueError(f'Unsupported format: {file_format}')
+
+
+class _Lookups:
+    """Product, lot code and inventory ids cached for the whole import"""
+
+    def __init__(self, warehouse_id):
+        self.warehouse_id = warehouse_id
+        # sku: {variant: (product id, disabled)}
+        self.products: Dict[str, Dict[str, Tuple[int, bool]]] = {}
+        self.lot_codes: Dict[Tuple[int, str], int] = {}
+        self.inventories: Dict[Tuple[int, Optional[int]], int] = {}
+
+    def load_products(self, skus):
+        skus = set(skus) - set(self.products)
+        for sku in skus:
+            self.products[sku] = {}
+        for product_id, sku, variant, disabled_at in Product.objects.filter(sku__in=skus).values_list(
+            'id', 'sku', 'variant', 'disabled_at'
+        ):
+            self.products[sku][variant] = (product_id, disabled_at is not None)
+
+    def product_id(self, sku, variant) -> int:
+        """:raise ValueError"""
+        variants = self.products.get(sku)
+        if not variants:
+            raise ValueError(f'Unknown SKU {sku}')
+        if variant:
+            if variant not in variants:
+                raise ValueError(f'Unknown variant {variant} of SKU {sku}')
+            product_id, disabled = variants[variant]
+        elif len(variants) > 1:
+            raise ValueError(f'SKU {sku} has several variants, the variant is required')
+        else:
+            product_id, disabled = next(iter(variants.values()))
+        if disabled:
+            raise ValueError(f'Product {sku} is disabled')
+        return product_id
+
+    def resolve_lot_codes(self, keys):
+        """Loads, and creates in bulk when missing, the lot codes of the (product id, lot number) keys"""
+        keys = set(keys) - set(self.lot_codes)
+        if not keys:
+            return
+        self._load_lot_codes(keys)
+        missing = keys - set(self.lot_codes)
+        if missing:
+            LotCode.objects.bulk_create(
+                [LotCode(product_id=product_id, lot_number=lot_number) for product_id, lot_number in missing],
+                ignore_conflicts=True,
+            )
+            self._load_lot_codes(missing)
+
+    def _load_lot_codes(self, keys):
+        product_ids = {product_id for product_id, _ in keys}
+        lot_numbers = {lot_number for _, lot_number in keys}
+        for lot_code_id, product_id, lot_number in LotCode.objects.filter(
+            product_id__in=product_ids, lot_number__in=lot_numbers
+        ).values_list('id', 'product_id', 'lot_number'):
+            if (product_id, lot_number) in keys:
+                self.lot_codes[(product_id, lot_number)] = lot_code_id
+
+    def resolve_inventories(self, keys):
+        """Loads, and creates in bulk when missing, the inventories of the (product id, lot code id) keys"""
+        keys = set(keys) - set(self.inventories)
+        if not keys:
+            return
+        self._load_inventories(keys)
+        missing = keys - set(self.inventories)
+        if missing:
+            Inventory.objects.bulk_create([
+                Inventory(product_id=product_id, warehouse_id=self.warehouse_id, lot_code_id=lot_code_id)
+                for product_id, lot_code_id in missing
+            ], ignore_conflicts=True)
+            self._load_inventories(missing)
+
+    def _load_inventories(self, keys):
+        for inventory_id, product_id, lot_code_id in Inventory.objects.filter(
+            warehouse_id=self.warehouse_id, product_id__in={product_id for product_id, _ in keys}
+        ).values_list('id', 'product_id', 'lot_code_id'):
+            if (product_id, lot_code_id) in keys:
+                self.inventories[(product_id, lot_code_id)] = inventory_id
+
+
+def _parse(row: dict, lookups: _Lookups, line: int) -> _Line:
+    """:raise ValueError"""
+    if '__invalid__' in row:
+        raise ValueError('Not a JSON object')
+    sku = str(row.get('sku') or '').strip()
+    if not sku:
+        raise ValueError('sku is required')
+
+    try:
+        quantity = int(str(row.get('quantity', '')).strip())
+    except ValueError:
+        raise ValueError('quantity must be an integer')
+    if not 0 < quantity <= MAX_QUANTITY:
+        raise ValueError(f'quantity must be between 1 and {MAX_QUANTITY}')
+
+    try:
+        price = Decimal(str(row.get('price', '')).strip())
+    except InvalidOperation:
+        raise ValueError('price must be a decimal number')
+    if not price.is_finite() or price < 0 or price > MAX_PRICE or price != price.quantize(PRICE_STEP):
+        raise ValueError('price must be an amount of at least 0 with at most 2 decimal places')
+
+    variant = str(row.get('variant') or '').strip()
+    lot_number = str(row.get('lot_number') or '').strip() or None
+    if lot_number is not None and len(lot_number) > MAX_LOT_NUMBER_LENGTH:
+        raise ValueError(f'lot_number is longer than {MAX_LOT_NUMBER_LENGTH} characters')
+    return _Line(line, lookups.product_id(sku, variant), lot_number, quantity, price)
+
+
+def import_receipt(file, warehouse, po_number=None, user=None, file_format=None, chunk_size=CHUNK_SIZE,
+                   error_writer=None) -> ImportResult:
+    """
+    Creates a receipt for the warehouse from the lines of the file and receives their stock.
+    Row errors are returned (the first MAX_REPORTED_ERRORS of them) and, when given, all written to
+    `error_writer` (a csv.writer) as (line, error, row) rows.
+    """
+    receipt = Receipt.objects.create(receiving_centre=warehouse, po_number=po_number, created_by=user)
+    lookups = _Lookups(warehouse.id)
+    rows = imported = error_count = 0
+    errors = []
+
+    def report(line, error, row):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append(RowError(line, error, row))
+        if error_writer is not None:
+            error_writer.writerow([line, error, json.dumps(row, default=str)])
+
+    chunk = []
+    for line, row in iter_rows(file, file_format):
+        rows += 1
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            imported += _import_chunk(chunk, receipt, lookups, user, report)
+            chunk = []
+    if chunk:
+        imported += _import_chunk(chunk, receipt, lookups, user, report)
+
+    return ImportResult(receipt, rows, imported, error_count, errors)
+
+
+def _import_chunk(chunk, receipt, lookups, user, report) -> int:
+    lookups.load_products(str(row.get('sku') or '').strip() for _, row in chunk if '__invalid__' not in row)
+
+    lines = []
+    for line, row in chunk:
+        try:
+            lines.append(_parse(row, lookups, line))
+        except ValueError as exc:
+            report(line, str(exc), row)
+    if not lines:
+        return 0
+
+    # lot codes and inventories are created outside of the chunk's transaction, so a retried chunk never
+    # finds ids of rolled back rows in the lookups
+    lookups.resolve_lot_codes((line.product_id, line.lot_number) for line in lines if line.lot_number is not None)
+    inventory_keys = [
+        (line.product_id, lookups.lot_codes[(line.product_id, line.lot_number)] if line.lot_number else None)
+        for line in lines
+    ]
+    lookups.resolve_inventories(inventory_keys)
+    inventory_ids = [lookups.inventories[key] for key in inventory_keys]
+
+    _receive(receipt, lines, inventory_ids, user)
+    return len(lines)
+
+
+@retry_on_serialization_failure
+def _receive(receipt, lines: List[_Line], inventory_ids: List[int], user):
+    with transaction.atomic():
+        line_items = LineItem.objects.bulk_create([
+            LineItem(receipt=receipt, product_id=line.product_id, price=line.price, quantity=line.quantity)
+            for line in lines
+        ])
+        apply_adjustments([
+            Adjustment(
+                inventory_id, InventoryAdjustment.REASON_CHOICES.inventory_received,
+                unordered_change=line.quantity, receipt_id=receipt.uuid, line_item_id=line_item.id,
+            )
+            for line, line_item, inventory_id in zip(lines, line_items, inventory_ids)
+        ], user=user)
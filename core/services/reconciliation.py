@@ -0,0 +1,174 @@
+"""
+Reconciliation of the `Inventory` counters (counter shards included) against the `InventoryAdjustment` ledger.
+
+The inventories are split into partitions (inventory id ranges or warehouses) which are checked in parallel by a
+process pool. Each partition streams its counters and the ledger totals, both ordered by inventory id, through
+server side cursors and merges them, so memory stays flat whatever the size of the ledger.
+"""
+import multiprocessing
+import time
+from typing import List, NamedTuple, Optional
+
+from django.db import connection, connections, transaction
+from django.db.models import Max, Min, Sum
+
+from core.models import Inventory, InventoryAdjustment, InventoryAdjustmentLog
+from core.services.counter_shards import add_shard_totals, shard_totals
+from core.services.inventory_adjustments import lock_inventories
+
+COUNTERS = ('unordered', 'ordered', 'fulfilled')
+CHUNK_SIZE = 10000
+PARTITIONS_PER_WORKER = 4
+
+SLIPPAGE_COMMENT = 'Reconciliation: ledger aligned with inventory counters'
+
+
+class Partition(NamedTuple):
+    label: str
+    warehouse_id: Optional[int] = None
+    first_id: Optional[int] = None
+    last_id: Optional[int] = None
+
+    def filter(self, queryset, inventory_field='id'):
+        if self.warehouse_id is not None:
+            warehouse_field = 'warehouse_id' if inventory_field == 'id' else f'{inventory_field}__warehouse_id'
+            return queryset.filter(**{warehouse_field: self.warehouse_id})
+        return queryset.filter(**{f'{inventory_field}__gte': self.first_id, f'{inventory_field}__lte': self.last_id})
+
+
+class Discrepancy(NamedTuple):
+    inventory_id: int
+    warehouse_id: int
+    product_id: int
+    counters: tuple
+    ledger: tuple
+
+    @property
+    def differences(self):
+        return tuple(counter - ledger for counter, ledger in zip(self.counters, self.ledger))
+
+
+class PartitionResult(NamedTuple):
+    partition: Partition
+    inventories: int
+    discrepancies: List[Discrepancy]
+    seconds: float
+
+
+def id_range_partitions(count) -> List[Partition]:
+    bounds = Inventory.objects.aggregate(first_id=Min('id'), last_id=Max('id'))
+    if bounds['first_id'] is None:
+        return []
+    size = max(1, -(-(bounds['last_id'] - bounds['first_id'] + 1) // count))
+    return [
+        Partition(label=f'ids {start}-{min(start + size - 1, bounds["last_id"])}',
+                  first_id=start, last_id=min(start + size - 1, bounds['last_id']))
+        for start in range(bounds['first_id'], bounds['last_id'] + 1, size)
+    ]
+
+
+def warehouse_partitions() -> List[Partition]:
+    warehouse_ids = Inventory.objects.order_by('warehouse_id').values_list('warehouse_id', flat=True).distinct()
+    return [Partition(label=f'warehouse {warehouse_id}', warehouse_id=warehouse_id) for warehouse_id in warehouse_ids]
+
+
+def reconcile_partition(partition: Partition) -> PartitionResult:
+    """
+    The counters, the ledger and the shards are read in a single `REPEATABLE READ` transaction, an adjustment
+    committed while the partition is read is then either in all of them or in none.
+    """
+    started = time.monotonic()
+    if connection.in_atomic_block:
+        # the isolation level can't change anymore, the outer transaction decides
+        return _reconcile_partition(partition, started)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        return _reconcile_partition(partition, started)
+
+
+def _reconcile_partition(partition: Partition, started) -> PartitionResult:
+    counters = partition.filter(Inventory.objects.all()).order_by('id').values_list(
+        'id', 'warehouse_id', 'product_id', *COUNTERS
+    ).iterator(chunk_size=CHUNK_SIZE)
+    ledger = partition.filter(InventoryAdjustment.objects.all(), 'inventory_id').values('inventory_id').annotate(
+        **{counter: Sum(f'{counter}_change') for counter in COUNTERS}
+    ).order_by('inventory_id').values_list('inventory_id', *COUNTERS).iterator(chunk_size=CHUNK_SIZE)
+
+    # only hot inventories have shards, their totals fit in memory
+    if partition.warehouse_id is not None:
+        shards = shard_totals(warehouse_id=partition.warehouse_id)
+    else:
+        shards = shard_totals(id__gte=partition.first_id, id__lte=partition.last_id)
+
+    discrepancies = []
+    inventories = 0
+    totals = next(ledger, None)
+    for inventory_id, warehouse_id, product_id, *values in counters:
+        inventories += 1
+        if inventory_id in shards:
+            values = [value + shard for value, shard in zip(values, shards[inventory_id])]
+        while totals is not None and totals[0] < inventory_id:
+            totals = next(ledger, None)
+        expected = tuple(totals[1:]) if totals is not None and totals[0] == inventory_id else (0, 0, 0)
+        if tuple(values) != expected:
+            discrepancies.append(Discrepancy(inventory_id, warehouse_id, product_id, tuple(values), expected))
+    return PartitionResult(partition, inventories, discrepancies, time.monotonic() - started)
+
+
+def reconcile(partitions: List[Partition], workers=1):
+    """Yields a PartitionResult per partition as soon as it is done"""
+    if workers <= 1:
+        for partition in partitions:
+            yield reconcile_partition(partition)
+        return
+
+    # forked workers must not share the parent's connections, closing them first makes every worker open its own
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        yield from pool.imap_unordered(reconcile_partition, partitions)
+
+
+def record_slippage(discrepancies: List[Discrepancy], user=None) -> int:
+    """
+    Treats the counters as the truth and records an `inventory_slippage` adjustment for every inventory whose
+    ledger still disagrees with its counters once the inventory is locked. The counters themselves are left
+    untouched, the adjustment and its log row only align the ledger with them.
+    Returns the number of corrections recorded.
+    """
+    corrections = 0
+    for start in range(0, len(discrepancies), CHUNK_SIZE):
+        inventory_ids = [discrepancy.inventory_id for discrepancy in discrepancies[start:start + CHUNK_SIZE]]
+        with transaction.atomic():
+            inventories = lock_inventories(inventory_ids)
+            add_shard_totals(inventories)
+            ledger = InventoryAdjustment.objects.filter(inventory_id__in=inventory_ids).values(
+                'inventory_id'
+            ).annotate(
+                **{counter: Sum(f'{counter}_change') for counter in COUNTERS}
+            ).order_by()
+            ledger = {row['inventory_id']: row for row in ledger}
+
+            adjustments, logs = [], []
+            for inventory_id, inventory in inventories.items():
+                differences = {
+                    counter: getattr(inventory, counter) - (ledger.get(inventory_id, {}).get(counter) or 0)
+                    for counter in COUNTERS
+                }
+                if not any(differences.values()):
+                    continue
+                adjustment = InventoryAdjustment(
+                    inventory=inventory, user=user, reason=InventoryAdjustment.REASON_CHOICES.inventory_slippage,
+                    comment=SLIPPAGE_COMMENT, **{f'{counter}_change': change for counter, change in differences.items()}
+                )
+                adjustments.append(adjustment)
+                logs.append(InventoryAdjustmentLog(
+                    inventory=inventory, source_adjustment=adjustment,
+                    **{f'{counter}_change': change for counter, change in differences.items()},
+                    **{f'absolute_pre_{counter}': getattr(inventory, counter) - change
+                       for counter, change in differences.items()},
+                    **{f'absolute_post_{counter}': getattr(inventory, counter) for counter in COUNTERS},
+                ))
+            InventoryAdjustment.objects.bulk_create(adjustments)
+            InventoryAdjustmentLog.objects.bulk_create(logs)
+            corrections += len(adjustments)
+    return corrections
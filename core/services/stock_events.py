@@ -0,0 +1,207 @@
+"""
+Live stock events over Postgres `LISTEN/NOTIFY`.
+
+`apply_adjustments` calls `notify_stock_changes` with the inventories it changed: the notifications are sent when
+its transaction commits, and never if it rolls back. A process serving live updates runs one `StockListener`, a
+single connection listening on `CHANNEL` that fans the changes out to its subscribers in memory, so the number of
+watchers doesn't cost database connections or queries.
+
+Notifications are not stored: a subscriber only gets the changes committed while it is subscribed, and all
+subscribers are dropped when the listening connection is lost. A client reconnecting reloads the inventories (or
+catches up with the change feed) before relying on the events again.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg2
+from django.db import connection
+
+from core.models import Inventory
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'stock_changes'
+# a payload is limited to 8000 bytes, 50 rows of 10 integers stay below it
+ROWS_PER_NOTIFICATION = 50
+# events waiting to be sent to a subscriber before it is dropped as too slow
+MAX_QUEUED_EVENTS = 1000
+
+EVENT_FIELDS = (
+    'inventory', 'warehouse', 'product', 'lot_code', 'unordered', 'ordered', 'fulfilled',
+    'unordered_change', 'ordered_change', 'fulfilled_change',
+)
+
+
+def notify_stock_changes(changes: Iterable[Tuple[Inventory, List[int]]]):
+    """
+    Notifies the listeners of the inventories with their new counters and the (unordered, ordered, fulfilled)
+    deltas applied to them. Must be called inside the transaction making the changes.
+    The counters of inventories with counter shards are read without locks, a concurrent writer may be missing.
+    """
+    rows = [
+        [inventory.id, inventory.warehouse_id, inventory.product_id, inventory.lot_code_id,
+         inventory.unordered, inventory.ordered, inventory.fulfilled, *delta]
+        for inventory, delta in changes
+    ]
+    if not rows:
+        return
+    payloads = [
+        json.dumps(rows[start:start + ROWS_PER_NOTIFICATION], separators=(',', ':'))
+        for start in range(0, len(rows), ROWS_PER_NOTIFICATION)
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) payload', [CHANNEL, payloads])
+
+
+class Subscription:
+    """The events of the inventories of a warehouse and/or a product, all of them without filters"""
+
+    def __init__(self, warehouse_id=None, product_id=None):
+        self.warehouse_id = warehouse_id
+        self.product_id = product_id
+        # encoded events, None once the subscription is closed
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    def matches(self, event: dict) -> bool:
+        return (self.warehouse_id is None or event['warehouse'] == self.warehouse_id) and (
+            self.product_id is None or event['product'] == self.product_id
+        )
+
+    def close(self):
+        self.queue.put_nowait(None)
+
+
+class StockListener:
+    """
+    Listens on `CHANNEL` with its own connection and dispatches the events to the subscriptions. Subscriptions
+    are indexed by warehouse, else by product, so an event only visits the subscriptions it may match.
+    The listener connects with the first subscription and runs in the event loop it was created in. With a
+    `heartbeat`, that message is queued to every subscription each `heartbeat_interval` seconds.
+    """
+
+    def __init__(self, connection_params: dict, encode=lambda event: json.dumps(event).encode(),
+                 heartbeat: bytes = None, heartbeat_interval: float = 15):
+        self.connection_params = connection_params
+        self.encode = encode
+        self.heartbeat = heartbeat
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeats: Optional[asyncio.Task] = None
+        self.connection = None
+        self.fileno = None
+        self.connecting: Optional[asyncio.Task] = None
+        self.by_warehouse: Dict[int, Set[Subscription]] = defaultdict(set)
+        self.by_product: Dict[int, Set[Subscription]] = defaultdict(set)
+        self.unfiltered: Set[Subscription] = set()
+
+    def _index(self, subscription: Subscription) -> Set[Subscription]:
+        if subscription.warehouse_id is not None:
+            return self.by_warehouse[subscription.warehouse_id]
+        if subscription.product_id is not None:
+            return self.by_product[subscription.product_id]
+        return self.unfiltered
+
+    async def subscribe(self, warehouse_id=None, product_id=None) -> Subscription:
+        """A new subscription, raises `psycopg2.Error` when the listener can't connect"""
+        if self.connection is None:
+            connecting = self.connecting
+            if connecting is None:
+                connecting = self.connecting = asyncio.ensure_future(self._connect())
+            try:
+                # shared by the subscriptions arriving meanwhile, a cancelled one doesn't cancel the others
+                await asyncio.shield(connecting)
+            finally:
+                if self.connecting is connecting and connecting.done():
+                    self.connecting = None
+        subscription = Subscription(warehouse_id, product_id)
+        self._index(subscription).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        index = self._index(subscription)
+        index.discard(subscription)
+        if not index and subscription.warehouse_id is not None:
+            del self.by_warehouse[subscription.warehouse_id]
+        elif not index and subscription.product_id is not None:
+            del self.by_product[subscription.product_id]
+
+    @property
+    def subscriptions(self) -> List[Subscription]:
+        return [
+            *self.unfiltered,
+            *(subscription for index in self.by_warehouse.values() for subscription in index),
+            *(subscription for index in self.by_product.values() for subscription in index),
+        ]
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        # the connection is opened in a thread, only the notifications are read in the loop
+        listening = await loop.run_in_executor(None, self._open)
+        self.fileno = listening.fileno()
+        loop.add_reader(self.fileno, self._read)
+        self.connection = listening
+        if self.heartbeat is not None:
+            self.heartbeats = asyncio.ensure_future(self._beat())
+
+    async def _beat(self):
+        # one timer for all the subscriptions rather than a timeout on every wait
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for subscription in self.subscriptions:
+                subscription.queue.put_nowait(self.heartbeat)
+
+    def _open(self):
+        listening = psycopg2.connect(
+            **self.connection_params,
+            # a lost connection shows up as a read error rather than as silence
+            keepalives=1, keepalives_idle=30, keepalives_interval=10, keepalives_count=3,
+        )
+        listening.autocommit = True
+        with listening.cursor() as cursor:
+            cursor.execute(f'LISTEN {CHANNEL}')
+        return listening
+
+    def _read(self):
+        try:
+            self.connection.poll()
+        except psycopg2.Error:
+            logger.exception('Stock listener connection lost')
+            self._disconnect()
+            return
+        while self.connection.notifies:
+            self.dispatch(self.connection.notifies.pop(0).payload)
+
+    def _disconnect(self):
+        asyncio.get_running_loop().remove_reader(self.fileno)
+        self.connection.close()
+        self.connection = None
+        if self.heartbeats is not None:
+            self.heartbeats.cancel()
+            self.heartbeats = None
+        # the events missed until the listener is back are lost, subscribers resync by reconnecting
+        for subscription in self.subscriptions:
+            subscription.close()
+        self.by_warehouse.clear()
+        self.by_product.clear()
+        self.unfiltered.clear()
+
+    def dispatch(self, payload: str):
+        for row in json.loads(payload):
+            event = dict(zip(EVENT_FIELDS, row))
+            candidates = [
+                self.unfiltered, self.by_warehouse.get(event['warehouse'], ()),
+                self.by_product.get(event['product'], ()),
+            ]
+            encoded = None
+            for subscription in [subscription for index in candidates for subscription in index]:
+                if not subscription.matches(event):
+                    continue
+                if subscription.queue.qsize() >= MAX_QUEUED_EVENTS:
+                    self.unsubscribe(subscription)
+                    subscription.close()
+                    continue
+                if encoded is None:
+                    encoded = self.encode(event)
+                subscription.queue.put_nowait(encoded)
@@ -0,0 +1,75 @@
+"""
+JWT revocation with a per user version counter.
+
+Access tokens carry the `UserTokenVersion` of their user when they were issued, `revoke_tokens` increments it and
+the tokens issued before stop being accepted. Checking a token needs the user's current state: `user_auth_state`
+keeps it in a small per process cache for `USER_STATE_TIMEOUT` seconds, so a revocation (or a deactivation) made
+in another process is seen within that time, and at once in the process making it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from core.models import UserTokenVersion
+
+USER_STATE_TIMEOUT = 30
+USER_STATE_CACHE_SIZE = 10000
+
+
+class UserAuthState(NamedTuple):
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    token_version: int
+
+
+_states: 'OrderedDict[int, tuple]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def user_auth_state(user_id) -> Optional[UserAuthState]:
+    """The state of the user, None if it doesn't exist. Cached per process, least recently used entries first out"""
+    now = time.monotonic()
+    with _lock:
+        cached = _states.get(user_id)
+        if cached is not None and cached[1] > now:
+            _states.move_to_end(user_id)
+            return cached[0]
+
+    row = get_user_model()._default_manager.filter(pk=user_id).values_list(
+        'is_active', 'is_staff', 'is_superuser', Coalesce('token_version__version', Value(0))
+    ).first()
+    state = UserAuthState(*row) if row is not None else None
+    with _lock:
+        _states[user_id] = (state, now + USER_STATE_TIMEOUT)
+        _states.move_to_end(user_id)
+        while len(_states) > USER_STATE_CACHE_SIZE:
+            _states.popitem(last=False)
+    return state
+
+
+def token_version(user_id) -> int:
+    """The current version of the user's tokens, read from the database to issue a token"""
+    return UserTokenVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+
+
+def revoke_tokens(user_id) -> int:
+    """Revokes all the tokens issued to the user so far and returns the new version"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {UserTokenVersion._meta.db_table} AS token_version (user_id, version, updated_at) '
+            f'VALUES (%s, 1, now()) '
+            f'ON CONFLICT (user_id) DO UPDATE SET version = token_version.version + 1, updated_at = now() '
+            f'RETURNING version',
+            [user_id]
+        )
+        version, = cursor.fetchone()
+    with _lock:
+        _states.pop(user_id, None)
+    return version
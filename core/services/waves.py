@@ -0,0 +1,191 @@
+"""
+Pick wave planning.
+
+`plan_waves` groups the open orders (`internal_status='not_yet_picked'`, not in a wave yet) into capacity limited
+waves of a single warehouse and print priority. The line item → location map is precomputed with a few queries:
+reserved line items are picked where their stock was reserved, the others at the location holding the most stock
+of their product. Each wave is seeded with the oldest remaining order and grown greedily with the orders sharing the
+most locations with the wave, found through a location → orders inverted index, so a wave walks fewer locations
+per unit picked.
+"""
+import heapq
+from collections import defaultdict
+from typing import List, NamedTuple, Optional, Set
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.models import Inventory, InventoryAdjustment, LineItem, Order, PickWave
+from core.models.orders import INTERNAL_STATUS_CHOICES
+
+WAVE_MAX_ORDERS = 50
+WAVE_MAX_UNITS = 500
+
+
+class OrderPicks(NamedTuple):
+    order_id: int
+    print_priority: int
+    warehouse_id: Optional[int]
+    units: int
+    location_ids: Set[object]
+
+
+class WavePlan(NamedTuple):
+    warehouse_id: Optional[int]
+    print_priority: int
+    order_ids: List[int]
+    units: int
+    location_ids: Set[object]
+
+
+def plannable_orders(orders=None):
+    orders = Order.objects.all() if orders is None else orders
+    return orders.filter(internal_status=INTERNAL_STATUS_CHOICES.not_yet_picked, pick_wave=None)
+
+
+def order_picks(orders) -> List[OrderPicks]:
+    """Units and pick locations of the orders, oldest first"""
+    order_rows = list(orders.order_by('created_at', 'id').values_list('id', 'print_priority'))
+
+    line_items = defaultdict(list)
+    for line_item_id, order_id, product_id, quantity in LineItem.objects.filter(order__in=orders).values_list(
+        'id', 'order_id', 'product_id', 'quantity'
+    ).order_by():
+        line_items[order_id].append((line_item_id, product_id, quantity))
+
+    reserved = defaultdict(list)
+    for line_item_id, warehouse_id, location_id in InventoryAdjustment.objects.filter(
+        order__in=orders, reason=InventoryAdjustment.REASON_CHOICES.order_reserved, line_item__isnull=False,
+    ).values_list('line_item_id', 'inventory__warehouse_id', 'inventory__location_id').order_by():
+        reserved[line_item_id].append((warehouse_id, location_id))
+
+    # the pick face of a product is the location holding most of its stock
+    primary = {}
+    for product_id, warehouse_id, location_id, _ in Inventory.objects.filter(
+        product_id__in={product_id for items in line_items.values() for _, product_id, _ in items},
+        location__isnull=False,
+    ).values('product_id', 'warehouse_id', 'location_id').annotate(stock=Sum('unordered')).order_by(
+        'product_id', '-stock'
+    ).values_list('product_id', 'warehouse_id', 'location_id', 'stock'):
+        primary.setdefault(product_id, (warehouse_id, location_id))
+
+    picks = []
+    for order_id, print_priority in order_rows:
+        units, locations, warehouses = 0, set(), defaultdict(int)
+        for line_item_id, product_id, quantity in line_items[order_id]:
+            units += quantity
+            for warehouse_id, location_id in reserved.get(line_item_id) or [primary.get(product_id, (None, None))]:
+                if location_id is not None:
+                    locations.add(location_id)
+                    warehouses[warehouse_id] += 1
+        warehouse_id = max(warehouses, key=warehouses.get) if warehouses else None
+        picks.append(OrderPicks(order_id, print_priority, warehouse_id, units, locations))
+    return picks
+
+
+def group_waves(picks: List[OrderPicks], max_orders=WAVE_MAX_ORDERS, max_units=WAVE_MAX_UNITS) -> List[WavePlan]:
+    """Greedy grouping of the (oldest first) orders per warehouse and priority, see the module docstring"""
+    groups = defaultdict(list)
+    for pick in picks:
+        groups[(pick.warehouse_id, pick.print_priority)].append(pick)
+
+    waves = []
+    for (warehouse_id, print_priority), group in sorted(
+        groups.items(), key=lambda item: (item[0][1], item[0][0] is None, item[0][0] or 0)
+    ):
+        waves += [
+            WavePlan(warehouse_id, print_priority, order_ids, units, locations)
+            for order_ids, units, locations in _group(group, max_orders, max_units)
+        ]
+    return waves
+
+
+def _group(picks: List[OrderPicks], max_orders, max_units):
+    index = defaultdict(list)
+    for rank, pick in enumerate(picks):
+        for location_id in pick.location_ids:
+            index[location_id].append(rank)
+
+    assigned = [False] * len(picks)
+    next_seed = 0
+    while True:
+        while next_seed < len(picks) and assigned[next_seed]:
+            next_seed += 1
+        if next_seed == len(picks):
+            return
+
+        order_ranks, units, locations = [], 0, set()
+        overlaps = defaultdict(int)
+        # (-share of the order's locations already in the wave, age rank) of the candidates
+        candidates = [(0, next_seed)]
+        fallback = next_seed
+        while len(order_ranks) < max_orders:
+            rank = _pop_candidate(candidates, overlaps, picks, assigned)
+            if rank is None:
+                # nothing shares a location with the wave anymore, fill it with the oldest orders
+                while fallback < len(picks) and (assigned[fallback] or units + picks[fallback].units > max_units):
+                    fallback += 1
+                if fallback == len(picks):
+                    break
+                rank = fallback
+            pick = picks[rank]
+            if order_ranks and units + pick.units > max_units:
+                continue
+
+            assigned[rank] = True
+            order_ranks.append(rank)
+            units += pick.units
+            for location_id in pick.location_ids - locations:
+                locations.add(location_id)
+                for other in index[location_id]:
+                    if not assigned[other]:
+                        overlaps[other] += 1
+                        heapq.heappush(candidates, (-overlaps[other] / len(picks[other].location_ids), other))
+            if units >= max_units:
+                break
+        yield [picks[rank].order_id for rank in order_ranks], units, locations
+
+
+def _pop_candidate(candidates, overlaps, picks, assigned):
+    """Pops the best candidate still unassigned whose heap entry is up to date"""
+    while candidates:
+        share, rank = heapq.heappop(candidates)
+        if assigned[rank]:
+            continue
+        location_count = len(picks[rank].location_ids)
+        if share == 0 or (location_count and -share == overlaps[rank] / location_count):
+            return rank
+    return None
+
+
+def plan_waves(orders=None, user=None, max_orders=WAVE_MAX_ORDERS, max_units=WAVE_MAX_UNITS,
+               dry_run=False) -> List[WavePlan]:
+    """
+    Plans and, unless `dry_run`, creates the pick waves of the open orders of the queryset.
+    Orders locked by a concurrent planning run are skipped.
+    """
+    with transaction.atomic():
+        order_ids = list(
+            plannable_orders(orders).select_for_update(skip_locked=True).order_by('id').values_list('id', flat=True)
+        )
+        plans = group_waves(order_picks(Order.objects.filter(id__in=order_ids)), max_orders, max_units)
+        if dry_run:
+            return plans
+
+        waves = PickWave.objects.bulk_create([
+            PickWave(
+                warehouse_id=plan.warehouse_id,
+                print_priority=plan.print_priority,
+                order_count=len(plan.order_ids),
+                unit_count=plan.units,
+                location_count=len(plan.location_ids),
+                created_by=user,
+            )
+            for plan in plans
+        ])
+        now = timezone.now()
+        for wave, plan in zip(waves, plans):
+            # update() skips `auto_now`
+            Order.objects.filter(id__in=plan.order_ids).update(pick_wave=wave, updated_at=now)
+    return plans
@@ -0,0 +1,29 @@
+"""
+ASGI config for layman_erp project.
+
+It exposes the ASGI callable as a module-level variable named ``application``. The live stock events
+(`api.streams`) are served by it only, every other request is handed to Django. Django 3.2 runs the sync views of
+an ASGI application one at a time, so the API stays on the WSGI application and this one runs next to it, e.g.
+``uvicorn layman_erp.asgi:application``, with the stream path routed to it.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'layman_erp.settings')
+
+django_application = get_asgi_application()
+
+# imported once the apps are loaded
+from api.streams import STREAM_PATH, inventory_events  # pylint: disable=wrong-import-position
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        await inventory_events(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
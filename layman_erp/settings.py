@@ -177,6 +177,16 @@ STATICFILES_DIRS = (
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
+# The local memory cache is per process, CACHE_URL must point at a shared cache outside of DEBUG (see core.checks)
+CACHES = {
+    'default': ENV.cache('CACHE_URL', default='locmemcache://?max_entries=100000'),
+}
+
+# Closed months of InventoryAdjustmentLog rows are archived here by `manage.py archive_adjustment_logs`
+ADJUSTMENT_LOG_ARCHIVE_DIR = ENV(
+    'ADJUSTMENT_LOG_ARCHIVE_DIR', default=os.path.join(BASE_DIR, 'archive', 'adjustment_logs')
+)
+
 
 class DummyInternalIPs:
     """Dummy class for whitelisting all IPs as internal IP while doing local dev
@@ -2,6 +2,7 @@ import calendar
 import csv
 import io
 import os
+from datetime import date, datetime, time
 
 from django.conf import settings
 from django.contrib import admin
@@ -12,6 +13,7 @@ from django.contrib.admin.filters import (
     RelatedFieldListFilter,
     RelatedOnlyFieldListFilter, FieldListFilter, DateFieldListFilter,
 )
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.contrib.admin.utils import lookup_field
 from django.contrib.postgres import fields
 from django.db import connection
@@ -162,6 +164,17 @@ class ReadOnlyMixin:
         return False
 
 
+# A partitioned table has no rows of its own, its estimate is the sum of its partitions' estimates
+ESTIMATE_COUNT_SQL = """
+    SELECT CASE WHEN parent.relkind = 'p' THEN (
+        SELECT COALESCE(SUM(GREATEST(child.reltuples, 0)), 0)
+        FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = parent.oid
+    ) ELSE parent.reltuples END
+    FROM pg_class parent WHERE parent.relname = %s
+"""
+
+
 class EstimateCountQuerySet:
     """
     Custom queryset class that uses table descriptors to return counts for unfiltered queries instead of exact
@@ -187,7 +200,7 @@ class EstimateCountQuerySet:
         if not query.where:
             try:
                 with connection.cursor() as cursor:
-                    cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [query.model._meta.db_table])
+                    cursor.execute(ESTIMATE_COUNT_SQL, [query.model._meta.db_table])
                     self._count = int(cursor.fetchone()[0])
             except:  # nopep8
                 self._count = super().count()
@@ -338,6 +351,34 @@ class MonthYearListFilter(admin.DateFieldListFilter):
     def expected_parameters(self):
         return [self.lookup_kwarg, self.lookup_kwarg_year]
 
+    def queryset(self, request, queryset):
+        """
+        When a year is selected, the selection is translated into a range on the field instead of `__month` and
+        `__year` lookups, so Postgres can use an index on the column or prune partitions instead of extracting
+        the month and year from every row.
+        """
+        month, year = self.lookup_val
+        if not year:
+            return super().queryset(request, queryset)
+
+        try:
+            year = int(year)
+            if month:
+                since = date(year, int(month), 1)
+                until = date(year + 1, 1, 1) if since.month == 12 else since.replace(month=since.month + 1)
+            else:
+                since, until = date(year, 1, 1), date(year + 1, 1, 1)
+        except ValueError as exc:
+            raise IncorrectLookupParameters(exc)
+
+        if isinstance(self.field, DateTimeField):
+            # months of the default time zone, the boundaries partitioned tables are cut on, so a month is one partition
+            since, until = (
+                timezone.make_aware(datetime.combine(day, time.min), timezone.get_default_timezone())
+                for day in (since, until)
+            )
+        return queryset.filter(**{f'{self.field_path}__gte': since, f'{self.field_path}__lt': until})
+
     def choices(self, changelist):
         month_year_choices = [[], []]
         currently_selected = {}
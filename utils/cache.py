@@ -0,0 +1,6 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache) -> bool:
+    """Whether the cache lives in the memory of this process only, where writes of other processes never show up"""
+    return isinstance(cache, LocMemCache)
@@ -0,0 +1,49 @@
+import functools
+import logging
+import random
+import time
+
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Postgres error codes for failures that are safe to retry from scratch
+SERIALIZATION_FAILURE = '40001'
+DEADLOCK_DETECTED = '40P01'
+RETRYABLE_PG_CODES = (SERIALIZATION_FAILURE, DEADLOCK_DETECTED)
+
+
+def is_retryable_error(exc) -> bool:
+    return getattr(exc.__cause__, 'pgcode', None) in RETRYABLE_PG_CODES
+
+
+def retry_on_serialization_failure(func=None, *, max_attempts=5, backoff=0.05):
+    """
+    Decorator which runs the wrapped function in its own transaction and retries it when Postgres aborts that
+    transaction because of a serialization failure or a deadlock.
+
+    The retry is only possible when the function owns the transaction, so when it is called inside an outer
+    `atomic` block it runs once and any error propagates to the owner of the outer transaction.
+    """
+    if func is None:
+        return functools.partial(retry_on_serialization_failure, max_attempts=max_attempts, backoff=backoff)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+
+        attempt = 1
+        while True:
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt >= max_attempts or not is_retryable_error(exc):
+                    raise
+                logger.warning('Retrying %s after %s (attempt %s)', func.__name__, exc.__cause__.pgcode, attempt)
+                # jittered exponential backoff so the conflicting transactions don't collide again
+                time.sleep(backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+                attempt += 1
+
+    return wrapper
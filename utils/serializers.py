@@ -1,7 +1,8 @@
 import csv
 import io
-from typing import List
+from typing import Dict, Iterable, List, Set
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models import QuerySet
 from rest_framework import serializers
 
@@ -237,3 +238,113 @@ class CSVListSerializer(serializers.ListSerializer):
 
     def __getattr__(self, attr):
         return getattr(self.child, attr)
+
+
+def parse_field_paths(value: str) -> Dict[str, dict]:
+    """
+    'id,product.sku,product.name' -> {'id': {}, 'product': {'sku': {}, 'name': {}}}
+    """
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (name.strip() for name in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and expansion of related objects, driven by the `fields` and `expand` query parameters of the
+    request in the serializer context (or the `fields` / `expand` arguments, as parsed by `parse_field_paths`)
+
+    `?fields=id,sku` keeps the listed fields only, `?expand=product` replaces the `product` field by the serializer
+    `Meta.expandable_fields['product']`, itself a DynamicFieldsMixin, and `?expand=product&fields=id,product.sku`
+    prunes the expanded serializer too. Unknown names are a validation error.
+
+    The fields are pruned when the serializer is built, so CSVMixin columns are the remaining readable fields and
+    `select_serializer_fields` fetches the columns they read only.
+    """
+    FIELDS_PARAM = 'fields'
+    EXPAND_PARAM = 'expand'
+
+    def __init__(self, *args, fields: Dict[str, dict] = None, expand: Dict[str, dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and expand is None and request is not None:
+            fields = parse_field_paths(request.query_params.get(self.FIELDS_PARAM, ''))
+            expand = parse_field_paths(request.query_params.get(self.EXPAND_PARAM, ''))
+        fields, expand = fields or {}, expand or {}
+
+        expandable = getattr(getattr(self, 'Meta', None), 'expandable_fields', {})
+        unknown = sorted(set(expand) - set(expandable))
+        if unknown:
+            raise serializers.ValidationError({self.EXPAND_PARAM: f'Unknown fields: {", ".join(unknown)}'})
+        for name, nested_expand in expand.items():
+            self.fields[name] = expandable[name](fields=fields.get(name), expand=nested_expand, read_only=True)
+
+        if fields:
+            unknown = sorted(set(fields) - set(self.fields))
+            unknown += sorted(
+                f'{name}.{next(iter(nested))}' for name, nested in fields.items()
+                if nested and name not in expand and name in self.fields
+            )
+            if unknown:
+                raise serializers.ValidationError({self.FIELDS_PARAM: f'Unknown fields: {", ".join(unknown)}'})
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def _all_columns(model, prefix) -> Set[str]:
+    return {f'{prefix}{field.name}' for field in model._meta.concrete_fields}
+
+
+def _serializer_columns(serializer, model, prefix, columns: Set[str], related: Set[str]):
+    """Adds the field paths and the forward relations the readable fields of the serializer read"""
+    for field in getattr(serializer, 'child', serializer)._readable_fields:
+        if field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                _serializer_columns(field, model, prefix, columns, related)
+            else:
+                columns.update(_all_columns(model, prefix))
+            continue
+
+        field_model, path = model, prefix
+        for index, attr in enumerate(field.source_attrs):
+            try:
+                model_field = field_model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                # a property or a method, it may read any column
+                columns.update(_all_columns(field_model, path))
+                break
+            if not model_field.is_relation:
+                columns.add(f'{path}{attr}')
+                break
+            if not model_field.concrete or model_field.many_to_many:
+                # reverse and many to many relations are queried on their own
+                break
+            if index == len(field.source_attrs) - 1 and not isinstance(field, serializers.BaseSerializer):
+                # the foreign key column, related fields serialize the primary key only
+                columns.add(f'{path}{attr}')
+                break
+            related.add(f'{path}{attr}')
+            field_model, path = model_field.related_model, f'{path}{attr}__'
+        else:
+            _serializer_columns(field, field_model, path, columns, related)
+
+
+def select_serializer_fields(queryset: QuerySet, serializer, extra: Iterable[str] = ()) -> QuerySet:
+    """
+    The queryset restricted to the columns the fields of the serializer read, `only()`, with their forward
+    relations joined, `select_related()`. `extra` field paths (e.g. `updated_at`, `product__counter_shards`) are read
+    by the caller. Fields whose source isn't a model field read the whole row of their model.
+    """
+    columns, related = set(), set()
+    _serializer_columns(serializer, queryset.model, '', columns, related)
+    for path in extra:
+        columns.add(path)
+        names = path.split('__')
+        related.update('__'.join(names[:index]) for index in range(1, len(names)))
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
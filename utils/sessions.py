@@ -0,0 +1,117 @@
+"""
+Session engine writing sessions only when needed.
+
+With `SESSION_SAVE_EVERY_REQUEST` Django saves the session of every request to renew its expiry. This engine keeps
+the sliding expiry the cookie carries but writes the row only when the data changed or when the stored expiry is
+getting close: rows are stored with `REFRESH_INTERVAL` seconds more than the session age, and an unchanged session
+is written again once less than the session age remains, at most once per `REFRESH_INTERVAL`. The row outlives
+the cookie by less than `REFRESH_INTERVAL`.
+
+Sessions are read through the `SESSION_CACHE_ALIAS` cache, which also keeps the stored expiry, so an unchanged
+session mostly costs no query at all. Entries live `CACHE_TIMEOUT` seconds at most. The cache is only used when it
+is shared by all the processes: with a per process cache a logout made by one process would leave the session alive
+in the others, so sessions are read from the database every time. `clear_expired` (`manage.py clearsessions`)
+deletes the expired rows in batches.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.core.cache import caches
+from django.db import connection
+from django.utils import timezone
+
+from utils.cache import is_process_local
+
+KEY_PREFIX = 'utils.sessions.'
+REFRESH_INTERVAL = 60 * 5
+CACHE_TIMEOUT = 60
+CLEAR_BATCH_SIZE = 10000
+
+
+class SessionStore(db.SessionStore):
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        # None when the cache isn't shared, a deleted session must be gone for every process at once
+        self._cache = None if is_process_local(cache) else cache
+        # the expiry of the stored row, None when there is none
+        self._stored_expiry = None
+
+    @property
+    def cache_key(self):
+        return KEY_PREFIX + self._get_or_create_session_key()
+
+    def load(self):
+        now = timezone.now()
+        cached = self._cache.get(self.cache_key) if self._cache is not None and self.session_key else None
+        if cached is not None and cached[1] > now:
+            data, self._stored_expiry = cached
+            return data
+
+        stored = self._get_session_from_db()
+        if stored is None:
+            self._stored_expiry = None
+            return {}
+        data, self._stored_expiry = self.decode(stored.session_data), stored.expire_date
+        self._cache_session(data, now)
+        return data
+
+    def _cache_session(self, data, now):
+        if self._cache is None:
+            return
+        timeout = min((self._stored_expiry - now).total_seconds(), CACHE_TIMEOUT)
+        if timeout > 0:
+            self._cache.set(self.cache_key, (data, self._stored_expiry), timeout)
+
+    def exists(self, session_key):
+        return self._cache is not None and KEY_PREFIX + session_key in self._cache or super().exists(session_key)
+
+    def create_model_instance(self, data):
+        instance = super().create_model_instance(data)
+        instance.expire_date += timedelta(seconds=REFRESH_INTERVAL)
+        self._stored_expiry = instance.expire_date
+        return instance
+
+    def save(self, must_create=False):
+        now = timezone.now()
+        if (
+            not must_create and not self.modified and self._stored_expiry is not None
+            and self._stored_expiry - now > timedelta(seconds=self.get_expiry_age())
+        ):
+            return
+        if self.session_key is None:
+            self.create()
+            return
+        data = self._get_session(no_load=must_create)
+        super().save(must_create=must_create)
+        self._cache_session(data, now)
+
+    def delete(self, session_key=None):
+        super().delete(session_key)
+        if session_key is None or session_key == self.session_key:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+            self._stored_expiry = None
+        if self._cache is not None:
+            self._cache.delete(KEY_PREFIX + session_key)
+
+    @classmethod
+    def clear_expired(cls, batch_size=CLEAR_BATCH_SIZE):
+        """Deletes the expired sessions, `batch_size` at a time, and returns how many were deleted"""
+        table = cls.get_model_class()._meta.db_table
+        now = timezone.now()
+        cleared = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {table} WHERE session_key IN ('
+                    f'    SELECT session_key FROM {table} WHERE expire_date < %s LIMIT %s FOR UPDATE SKIP LOCKED'
+                    f')',
+                    [now, batch_size]
+                )
+                cleared += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    return cleared